@@ -0,0 +1,89 @@
+import sys
+import time
+from numpy import zeros, array, arange, uint8, int64
+from turmite import Rule
+from walker import LANGTON, FOURCOLOR
+
+"""
+batchAnts.py
+Thousands of independent ants, each on its own grid, all advanced together with numpy.
+@author: RedSunAtNight
+"""
+# One ant on its own is a long chain of dependent steps, but separate ants do not affect each other, so K of them can
+# take their step in the same array operation. The K grids are stacked into one (K, side, side) uint8 array, and the
+# compiled rules (which may differ from ant to ant) are stacked into lookup tables indexed by [ant, state, colour, direction].
+# Grids are finite here, so an ant that walks off one edge comes back on the opposite one (the grid is a torus).
+# Rules with fewer colours or states than the largest one are padded; the padding is never reached, since an ant only
+# paints colours and enters states from its own rule.
+# Run this file to measure throughput: python batchAnts.py [ants] [steps] [side]
+
+#   BatchAnts
+#   rules: one rule (anything turmite.Rule accepts) per ant. directions: starting direction per ant, default 2 for all.
+#   Every ant starts in state 0 in the middle of its own blank grid.
+class BatchAnts:
+	def __init__(self, rules, side=256, directions=None):
+		rules = [Rule(rule) for rule in rules]
+		count = len(rules)
+		states = max(rule.states for rule in rules)
+		colours = max(rule.colours for rule in rules)
+		self.side = side
+		self.grids = zeros((count, side, side), dtype=uint8)
+		self.rows = zeros(count, dtype=int64) + side // 2
+		self.cols = zeros(count, dtype=int64) + side // 2
+		if directions is None:
+			directions = [2] * count
+		self.directions = array(directions, dtype=int64)
+		self.states = zeros(count, dtype=int64)
+		self.steps = 0
+		# [ant, state, colour, direction] lookup tables
+		shape = (count, states, colours, 4)
+		self.newColours = zeros(shape, dtype=uint8)
+		self.newDirections = zeros(shape, dtype=int64)
+		self.rowMoves = zeros(shape, dtype=int64)
+		self.colMoves = zeros(shape, dtype=int64)
+		self.newStates = zeros(shape, dtype=int64)
+		for ant, rule in enumerate(rules):
+			ruleShape = (rule.states, rule.colours, 4)
+			self.newColours[ant, :rule.states, :rule.colours] = rule.newColour.reshape(ruleShape)
+			self.newDirections[ant, :rule.states, :rule.colours] = rule.newDirection.reshape(ruleShape)
+			self.rowMoves[ant, :rule.states, :rule.colours] = rule.rowMove.reshape(ruleShape)
+			self.colMoves[ant, :rule.states, :rule.colours] = rule.colMove.reshape(ruleShape)
+			self.newStates[ant, :rule.states, :rule.colours] = rule.newState.reshape(ruleShape)
+		# Flat views, so a step needs one index computation per lookup instead of four-way fancy indexing.
+		self._cells = self.grids.reshape(-1)
+		self._gridStarts = arange(count, dtype=int64) * side * side
+		self._tableStarts = arange(count, dtype=int64) * states * colours * 4
+		self._colourStride = 4
+		self._stateStride = colours * 4
+		self._newColours = self.newColours.reshape(-1)
+		self._newDirections = self.newDirections.reshape(-1)
+		self._rowMoves = self.rowMoves.reshape(-1)
+		self._colMoves = self.colMoves.reshape(-1)
+		self._newStates = self.newStates.reshape(-1)
+
+	# Every ant takes one step.
+	def step(self):
+		cells = self._gridStarts + self.rows * self.side + self.cols
+		entries = self._tableStarts + self.states * self._stateStride + self._cells[cells].astype(int64) * self._colourStride + self.directions
+		self._cells[cells] = self._newColours[entries]
+		self.rows = (self.rows + self._rowMoves[entries]) % self.side
+		self.cols = (self.cols + self._colMoves[entries]) % self.side
+		self.directions = self._newDirections[entries]
+		self.states = self._newStates[entries]
+		self.steps += 1
+
+	def run(self, nSteps):
+		for i in range(0, nSteps):
+			self.step()
+
+if __name__ == '__main__':
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+	maxN = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+	side = int(sys.argv[3]) if len(sys.argv) > 3 else 128
+	# half Langton's ants, half four-colour ants, starting in all four directions
+	rules = [LANGTON if ant % 2 else FOURCOLOR for ant in range(0, count)]
+	batch = BatchAnts(rules, side, [ant % 4 for ant in range(0, count)])
+	start = time.time()
+	batch.run(maxN)
+	elapsed = time.time() - start
+	print('{0} ants x {1} steps in {2:.2f} s: {3:.3g} ant-steps per second'.format(count, maxN, elapsed, count * maxN / elapsed))
@@ -0,0 +1,151 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+from multiprocessing import Pool
+import numpy
+from tiledGrid import TiledGrid
+from gridStorage import DenseGrid, BitGrid
+from walker import Walker, LANGTON
+from highway import HighwayWalker
+from macroStep import MacroWalker
+from batchAnts import BatchAnts
+from checkpoint import saveCheckpoint, fingerprint
+try:
+	import resource
+except ImportError:
+	resource = None
+
+"""
+benchAnts.py
+Step throughput and memory of every ant engine on every grid type, from 10**4 steps up to 10**9, written as JSON.
+@author: RedSunAtNight
+"""
+# Each case is an engine on a grid, run from a blank grid for 10**4, 10**5, ... steps. For each run the results hold:
+#   seconds, stepsPerSecond
+#   gridBytes        bytes the grid's cells take (grid.nbytes())
+#   peakRSS          most memory the process ever held, in KiB; every run has a fresh process so this is that run's
+#   checkpointBytes  size of the compressed checkpoint (see checkpoint.py), and checkpointSeconds to write it
+#   fingerprint      checkpoint.fingerprint of where the ant ended up, so a change that alters the walk shows up
+#   error            instead of the above, if the run failed (a fixed-size grid the ant walked off, say)
+# A case stops going up once the next run would take longer than the time budget (judged from its last run), so
+# the plain engines stop around 10**7 while the highway engine carries on to 10**9. The fixed grids are SIDE cells
+# across, and Langton's highway reaches their edge a little under 10**6 steps, so those cases end there with an error.
+# Every engine runs Langton's ant. The batch engine runs 1024 ants at once on small torus grids; its steps are ant-steps.
+# Give a previous results file to print how each run's speed compares with it.
+# Usage: python benchAnts.py [output.json] [maxExponent] [budget seconds] [previous.json]
+
+SIDE = 8192
+BATCH = 1024
+
+ENGINES = ['walker', 'highway', 'macro', 'batch']
+GRIDS = ['tiled', 'dense', 'bits', 'dense-file', 'bits-file']
+
+def _grid(kind, directory):
+	if kind == 'tiled':
+		return TiledGrid()
+	filename = os.path.join(directory, kind + '.npy') if kind.endswith('-file') else None
+	if kind.startswith('dense'):
+		return DenseGrid(SIDE, filename)
+	return BitGrid(SIDE, filename)
+
+# Every engine and grid pair that makes sense. MacroWalker needs the tiles of a TiledGrid, and BatchAnts has its own grids.
+def cases():
+	found = []
+	for engine in ENGINES:
+		if engine == 'batch':
+			found.append((engine, 'stacked'))
+		elif engine == 'macro':
+			found.append((engine, 'tiled'))
+		else:
+			found.extend((engine, grid) for grid in GRIDS)
+	return found
+
+def _peakRSS():
+	if resource is None:
+		return None
+	return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+# Run one case for nSteps from scratch. Returns a dict for the results.
+def runCase(engine, gridKind, nSteps):
+	result = {'engine': engine, 'grid': gridKind, 'steps': nSteps}
+	directory = tempfile.mkdtemp(prefix='benchAnts')
+	try:
+		if engine == 'batch':
+			ant = BatchAnts([LANGTON] * BATCH, 256, [ant % 4 for ant in range(0, BATCH)])
+			start = time.time()
+			ant.run(max(nSteps // BATCH, 1))
+			result['seconds'] = time.time() - start
+			result['steps'] = ant.steps * BATCH
+			result['gridBytes'] = ant.grids.nbytes
+		else:
+			if engine == 'macro':
+				ant = MacroWalker(LANGTON)
+			else:
+				kind = HighwayWalker if engine == 'highway' else Walker
+				ant = kind(LANGTON, _grid(gridKind, directory))
+			start = time.time()
+			ant.run(nSteps)
+			result['seconds'] = time.time() - start
+			result['gridBytes'] = ant.grid.nbytes()
+			filename = os.path.join(directory, 'checkpoint.npz')
+			start = time.time()
+			saveCheckpoint(filename, ant, embed=True)
+			result['checkpointSeconds'] = time.time() - start
+			result['checkpointBytes'] = os.path.getsize(filename)
+			result['fingerprint'] = fingerprint(ant)
+		result['stepsPerSecond'] = result['steps'] / max(result['seconds'], 1e-9)
+	except (IndexError, ValueError, MemoryError) as problem:
+		result['error'] = str(problem)
+	finally:
+		shutil.rmtree(directory, ignore_errors=True)
+	result['peakRSS'] = _peakRSS()
+	return result
+
+def _runCase(job):
+	return runCase(*job)
+
+# Run every case from 10**minExponent steps up, stopping each one when the next run would go over budget seconds.
+def benchmark(maxExponent=9, budget=60., minExponent=4):
+	results = []
+	# a fresh process for every run, so peakRSS belongs to that run alone
+	pool = Pool(1, maxtasksperchild=1)
+	try:
+		for (engine, gridKind) in cases():
+			for exponent in range(minExponent, maxExponent + 1):
+				result = pool.apply(_runCase, ((engine, gridKind, 10 ** exponent),))
+				results.append(result)
+				print('{0:8} {1:10} 10**{2}: {3}'.format(engine, gridKind, exponent,
+					result['error'] if 'error' in result else '{0:.3g} steps/s'.format(result['stepsPerSecond'])))
+				if 'error' in result or 10 ** (exponent + 1) / result['stepsPerSecond'] > budget:
+					break
+	finally:
+		pool.terminate()
+	return {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(), 'numpy': numpy.__version__,
+		'machine': platform.platform(), 'side': SIDE, 'batch': BATCH, 'budget': budget, 'results': results}
+
+# {(engine, grid, steps): new speed / old speed} for the runs both have.
+def compare(previous, current):
+	old = dict(((result['engine'], result['grid'], result['steps']), result) for result in previous['results'] if 'error' not in result)
+	ratios = {}
+	for result in current['results']:
+		key = (result['engine'], result['grid'], result['steps'])
+		if key in old and 'error' not in result:
+			ratios[key] = result['stepsPerSecond'] / old[key]['stepsPerSecond']
+	return ratios
+
+if __name__ == '__main__':
+	output = sys.argv[1] if len(sys.argv) > 1 else 'benchAnts.json'
+	maxExponent = int(sys.argv[2]) if len(sys.argv) > 2 else 9
+	budget = float(sys.argv[3]) if len(sys.argv) > 3 else 60.
+	results = benchmark(maxExponent, budget)
+	with open(output, 'w') as saved:
+		json.dump(results, saved, indent=1)
+	if len(sys.argv) > 4:
+		with open(sys.argv[4]) as saved:
+			previous = json.load(saved)
+		for (key, ratio) in sorted(compare(previous, results).items()):
+			print('{0:8} {1:10} {2:>10}: {3:.2f}x'.format(key[0], key[1], key[2], ratio))
@@ -0,0 +1,149 @@
+import os
+import json
+import hashlib
+import numpy
+from numpy import zeros, array, concatenate, int64, uint8, savez_compressed
+from tiledGrid import TiledGrid
+from gridStorage import DenseGrid, BitGrid
+from walker import Walker
+from highway import HighwayWalker, HighwaySegment
+from macroStep import MacroWalker
+
+"""
+checkpoint.py
+Saves an ant and its grid to one compressed file and loads it back, so long runs can be paused, resumed and compared.
+@author: RedSunAtNight
+"""
+# A checkpoint is a compressed .npz holding:
+#   ant        JSON: engine class, rule, position, direction, state, steps, and the engine's own settings
+#   grid       JSON: grid type and its settings
+#   cells      TiledGrid: tile keys (n, 2) and the tiles (n, side, side), leaving out blank tiles where it is safe to;
+#              DenseGrid / BitGrid: the cell array, unless the grid lives in a file, which is flushed and referred to by name
+#              (so the file keeps changing with the run; only one ant should carry on from it)
+#   overlays   the highway segments, as flat arrays, so a run that jumped 10**12 steps stays small
+#   history    HighwayWalker's recent steps, so it can spot the same highway straight after resuming
+# The file is written to a temporary name and then renamed, so a run killed mid-save keeps its previous checkpoint.
+# fingerprint(ant) gives a short hash of the ant and its grid, to check that two runs with the same engine and kind of
+# grid reached the same place.
+
+ENGINES = {'Walker': Walker, 'HighwayWalker': HighwayWalker, 'MacroWalker': MacroWalker}
+
+def _antSettings(ant):
+	settings = {'engine': type(ant).__name__, 'rule': ant.rule.source, 'row': int(ant.row), 'col': int(ant.col),
+		'direction': int(ant.direction), 'state': int(ant.state), 'steps': int(ant.steps)}
+	if isinstance(ant, HighwayWalker):
+		settings.update({'maxPeriod': ant.maxPeriod, 'repeats': ant.repeats, 'checkEvery': ant.checkEvery,
+			'skippedSteps': int(ant.skippedSteps), 'highway': [int(n) for n in ant.highway] if ant.highway else None,
+			'next': ant._next, 'filled': ant._filled})
+	if isinstance(ant, MacroWalker):
+		settings['cacheSize'] = ant.cacheSize
+	if settings['engine'] not in ENGINES:
+		raise ValueError('Cannot checkpoint a {0}.'.format(settings['engine']))
+	return settings
+
+# embed=True stores the cells of a grid kept in a file too, so the checkpoint stays as it was when the run carries on
+# (it loads into memory rather than back into the file).
+def saveCheckpoint(filename, ant, embed=False):
+	grid = ant.grid
+	arrays = {}
+	if isinstance(grid, TiledGrid):
+		gridSettings = {'type': 'tiled', 'tileBits': grid.tileBits, 'dtype': numpy.dtype(grid.dtype).name}
+		# a blank tile is only needed if an overlay would paint something else into it when it is made again
+		keys = [key for key, tile in grid.tiles.items() if grid.overlays or tile.any()]
+		arrays['tileKeys'] = array(keys, dtype=int64).reshape(len(keys), 2)
+		arrays['tiles'] = array([grid.tiles[key] for key in keys], dtype=grid.dtype).reshape(len(keys), grid.tileSide, grid.tileSide)
+		overlays = grid.overlays
+	elif isinstance(grid, (DenseGrid, BitGrid)):
+		cells = grid.cells if isinstance(grid, DenseGrid) else grid.bits
+		gridSettings = {'type': 'dense' if isinstance(grid, DenseGrid) else 'bits', 'side': grid.side, 'file': None}
+		if isinstance(cells, numpy.memmap) and not embed:
+			cells.flush()
+			gridSettings['file'] = os.path.abspath(cells.filename)
+		else:
+			arrays['cells'] = cells
+		overlays = []
+	else:
+		raise ValueError('Cannot checkpoint a {0}.'.format(type(grid).__name__))
+	# segments one after another; the last setting of each is how many cells it has
+	arrays['overlaySettings'] = array([list(segment.origin) + list(segment.shift) + [segment.periods, len(segment.cells)] for segment in overlays], dtype=int64).reshape(len(overlays), 6)
+	arrays['overlayRows'] = concatenate([segment.relRows for segment in overlays] + [zeros(0, dtype=int64)])
+	arrays['overlayCols'] = concatenate([segment.relCols for segment in overlays] + [zeros(0, dtype=int64)])
+	arrays['overlayValues'] = concatenate([segment.values.astype(uint8) for segment in overlays] + [zeros(0, dtype=uint8)])
+	if isinstance(ant, HighwayWalker):
+		arrays['history'] = array([ant._rows, ant._cols, ant._dirs, ant._reads])
+	arrays['ant'] = array(json.dumps(_antSettings(ant)))
+	arrays['grid'] = array(json.dumps(gridSettings))
+	temporary = filename + '.tmp'
+	with open(temporary, 'wb') as output:
+		savez_compressed(output, **arrays)
+	os.replace(temporary, filename)
+
+def loadCheckpoint(filename):
+	with numpy.load(filename) as saved:
+		settings = json.loads(str(saved['ant']))
+		gridSettings = json.loads(str(saved['grid']))
+		if gridSettings['type'] == 'tiled':
+			grid = TiledGrid(gridSettings['tileBits'], numpy.dtype(gridSettings['dtype']))
+			for key, tile in zip(saved['tileKeys'], saved['tiles']):
+				grid.tiles[(int(key[0]), int(key[1]))] = tile.copy()
+		else:
+			kind = DenseGrid if gridSettings['type'] == 'dense' else BitGrid
+			grid = kind(gridSettings['side'], gridSettings['file'])
+			if gridSettings['file'] is None:
+				if kind is DenseGrid:
+					grid.cells[:] = saved['cells']
+				else:
+					grid.bits[:] = saved['cells']
+		start = 0
+		for (originRow, originCol, dRow, dCol, periods, size) in saved['overlaySettings']:
+			cells = [((int(row), int(col)), value) for row, col, value in
+				zip(saved['overlayRows'][start:start + size], saved['overlayCols'][start:start + size], saved['overlayValues'][start:start + size])]
+			# straight onto the list: the tiles saved already have the overlays painted in
+			grid.overlays.append(HighwaySegment((int(originRow), int(originCol)), (int(dRow), int(dCol)), int(periods), cells))
+			start += size
+		engine = ENGINES[settings['engine']]
+		position = (settings['row'], settings['col'])
+		if engine is HighwayWalker:
+			ant = HighwayWalker(settings['rule'], grid, position, settings['direction'], settings['state'],
+				settings['maxPeriod'], settings['repeats'], settings['checkEvery'])
+			(ant._rows, ant._cols, ant._dirs, ant._reads) = [row.copy() for row in saved['history']]
+			(ant._next, ant._filled) = (settings['next'], settings['filled'])
+			ant.skippedSteps = settings['skippedSteps']
+			ant.highway = tuple(settings['highway']) if settings['highway'] else None
+		elif engine is MacroWalker:
+			ant = MacroWalker(settings['rule'], grid, position, settings['direction'], settings['state'], cacheSize=settings['cacheSize'])
+		else:
+			ant = Walker(settings['rule'], grid, position, settings['direction'], settings['state'])
+		ant.steps = settings['steps']
+	return ant
+
+# Hash of the ant's position, direction, state and step count, and of every non-blank cell the grid stores, with a
+# TiledGrid's highway segments hashed as they were laid down rather than cell by cell (which could be 10**12 cells).
+# Two fingerprints are only comparable for runs with the same engine on the same kind of grid. Walker gives the same
+# hash on any grid, but once a run has highway segments the hash also depends on the grid: DenseGrid and BitGrid paint
+# the segments into their cells, while a TiledGrid keeps them apart and holds painted copies in whichever tiles exist,
+# which depends on the tile size.
+def fingerprint(ant):
+	digest = hashlib.sha1(json.dumps([int(ant.row), int(ant.col), int(ant.direction), int(ant.state), int(ant.steps)]).encode())
+	grid = ant.grid
+	if isinstance(grid, TiledGrid):
+		pieces = []
+		for (tileRow, tileCol), tile in grid.tiles.items():
+			(rows, cols) = tile.nonzero()
+			pieces.append(((rows + (tileRow << grid.tileBits)), (cols + (tileCol << grid.tileBits)), tile[rows, cols]))
+		overlays = grid.overlays
+	else:
+		(cells, (top, left)) = grid.toArray()
+		(rows, cols) = cells.nonzero()
+		pieces = [(rows + top, cols + left, cells[rows, cols])]
+		overlays = []
+	rows = concatenate([piece[0] for piece in pieces] + [zeros(0, dtype=int64)]).astype(int64)
+	cols = concatenate([piece[1] for piece in pieces] + [zeros(0, dtype=int64)]).astype(int64)
+	values = concatenate([piece[2] for piece in pieces] + [zeros(0, dtype=uint8)]).astype(uint8)
+	order = numpy.lexsort((cols, rows))
+	digest.update(rows[order].tobytes())
+	digest.update(cols[order].tobytes())
+	digest.update(values[order].tobytes())
+	for segment in overlays:
+		digest.update(json.dumps([int(n) for n in segment.origin + segment.shift + (segment.periods,)]).encode())
+	return digest.hexdigest()
@@ -0,0 +1,119 @@
+import sys
+import time
+from numpy import array, zeros, arange, argsort, flatnonzero, maximum, concatenate, int64
+from turmite import Rule
+from walker import LANGTON
+from gridStorage import DenseGrid
+
+"""
+colony.py
+Many ants sharing one grid, with their positions, directions and states held in arrays and stepped together with numpy.
+@author: RedSunAtNight
+"""
+# A step of the colony means the same as this loop, which is the rule for ants that meet:
+#     for ant in range(0, count): ant takes its step (reads its cell, paints it, turns, moves)
+# Ants take their step in index order, and an ant sees the colour left by any ant before it in the same step, so when
+# several ants stand on one cell, the first paints it, the second reads that colour and paints over it, and so on.
+# Ants may share a cell; they never block each other.
+#
+# A step only reads and writes the cell the ant is standing on, so ants on different cells cannot affect each other
+# within a step and can all go at once. step() ranks the ants on each cell by index (0 for the first ant there, 1 for
+# the next...), then does all the rank-0 ants in one array operation, then all the rank-1 ants, and so on. With no
+# shared cells, which is nearly always, that is a single pass.
+#
+# The cells live in a gridStorage.DenseGrid (so toArray, render.py and checkpoint.py all work on colony.grid), with
+# (0, 0) in the middle. With wrap=True, an ant leaving one edge comes back on the opposite one, as in batchAnts.py;
+# otherwise walking off the grid is an IndexError.
+# Run this file to measure throughput: python colony.py [ants] [steps] [side]
+
+#   Colony
+#   rule: anything turmite.Rule accepts, shared by every ant. positions: (row, col) of each ant.
+#   directions and states: per ant, by default 2 (down) and 0. filename keeps the grid in a file (see gridStorage.py).
+class Colony:
+	def __init__(self, rule, positions, directions=None, states=None, side=1024, filename=None, wrap=True):
+		self.rule = Rule(rule)
+		self.grid = DenseGrid(side, filename)
+		self.wrap = wrap
+		count = len(positions)
+		positions = array(positions, dtype=int64).reshape(count, 2)
+		self.rows = positions[:, 0].copy()
+		self.cols = positions[:, 1].copy()
+		self.directions = array(directions if directions is not None else [2] * count, dtype=int64)
+		self.states = array(states if states is not None else [0] * count, dtype=int64)
+		self.steps = 0
+		self.passes = 0 # passes over the ants so far; more than steps when ants shared cells
+		self._cells = self.grid.cells.reshape(-1)
+		if self.wrap:
+			self._wrap()
+		else:
+			self._checkInside()
+
+	def _wrap(self):
+		self.rows = (self.rows - self.grid.top) % self.grid.side + self.grid.top
+		self.cols = (self.cols - self.grid.left) % self.grid.side + self.grid.left
+
+	def _checkInside(self):
+		outside = flatnonzero((self.rows < self.grid.top) | (self.rows >= self.grid.top + self.grid.side) |
+			(self.cols < self.grid.left) | (self.cols >= self.grid.left + self.grid.side))
+		if len(outside):
+			ant = outside[0]
+			raise IndexError('Ant {0} walked off the grid at y={1}, x={2}.'.format(ant, self.rows[ant], self.cols[ant]))
+
+	# Rank of each ant among the ants on its cell, counting in index order.
+	def _ranks(self, cells):
+		order = argsort(cells, kind='stable')
+		ordered = cells[order]
+		firsts = concatenate(([True], ordered[1:] != ordered[:-1]))
+		if firsts.all():
+			return None
+		positions = arange(len(cells))
+		ranks = zeros(len(cells), dtype=int64)
+		ranks[order] = positions - maximum.accumulate(positions * firsts)
+		return ranks
+
+	def _move(self, ants, cells):
+		colours = self._cells[cells].astype(int64)
+		if colours.max() >= self.rule.colours:
+			ant = ants[flatnonzero(colours >= self.rule.colours)[0]]
+			raise ValueError("Invalid value at grid position y={0}, x={1}; occurred during step {2}.".format(self.rows[ant], self.cols[ant], self.steps))
+		entries = (self.states[ants] * self.rule.colours + colours) * 4 + self.directions[ants]
+		self._cells[cells] = self.rule.newColour[entries]
+		self.rows[ants] += self.rule.rowMove[entries]
+		self.cols[ants] += self.rule.colMove[entries]
+		self.directions[ants] = self.rule.newDirection[entries]
+		self.states[ants] = self.rule.newState[entries]
+		self.passes += 1
+
+	# Every ant takes one step.
+	def step(self):
+		cells = (self.rows - self.grid.top) * self.grid.side + (self.cols - self.grid.left)
+		ranks = self._ranks(cells)
+		if ranks is None:
+			self._move(arange(len(cells)), cells)
+		else:
+			for rank in range(0, ranks.max() + 1):
+				ants = flatnonzero(ranks == rank)
+				self._move(ants, cells[ants])
+		if self.wrap:
+			self._wrap()
+		else:
+			self._checkInside()
+		self.steps += 1
+
+	def run(self, nSteps):
+		for i in range(0, nSteps):
+			self.step()
+
+	def positions(self):
+		return list(zip(self.rows.tolist(), self.cols.tolist()))
+
+if __name__ == '__main__':
+	count = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+	maxN = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+	side = int(sys.argv[3]) if len(sys.argv) > 3 else 1024
+	# ants spread along a diagonal, facing all four ways
+	colony = Colony(LANGTON, [(ant - count // 2, (3 * ant) % side - side // 2) for ant in range(0, count)], [ant % 4 for ant in range(0, count)], side=side)
+	start = time.time()
+	colony.run(maxN)
+	elapsed = time.time() - start
+	print('{0} ants x {1} steps in {2:.2f} s: {3:.3g} ant-steps per second, {4} passes'.format(count, maxN, elapsed, count * maxN / elapsed, colony.passes))
@@ -0,0 +1,164 @@
+import os
+from numpy import zeros, array, uint8, packbits, unpackbits
+from numpy.lib.format import open_memmap
+
+"""
+gridStorage.py
+Fixed-size grids for very long runs: one byte per cell, or one bit per cell for two-colour rules, optionally kept in a file.
+@author: RedSunAtNight
+"""
+# The original scripts stored the grid as float64, 8 bytes for a cell that only ever holds 0-3. DenseGrid stores a byte
+# per cell (8x smaller) and BitGrid a bit per cell (64x smaller), so far more of the grid fits in the processor caches.
+# Give either one a filename and the cells live in a memory-mapped .npy file instead of memory, so a grid can have
+# billions of cells and the operating system pages in only the parts the ant is using. An existing file is reopened,
+# so a grid can be picked up again later (np.load works on it too).
+#
+# Both have the same cell interface as tiledGrid.TiledGrid, which is what Walker and HighwayWalker use:
+#   get(row, col), set(row, col, value), grid[row, col]
+#   bounds()      (top, left, bottom, right) of the cells that exist
+#   regions()     boxes outside which every cell is blank
+#   addOverlay()  lay a HighwaySegment (see highway.py) over the grid
+#   toArray()     (dense copy, (row, col) of its corner); toArray(window) copies just (top, left, bottom, right)
+#   nbytes()      bytes used by the cells
+# They have no tiles (tileAt, tileBits, tileSide), so MacroWalker, which caches whole tiles, only runs on a TiledGrid.
+# The grids are side x side cells with (0, 0) in the middle. Reading outside reads blank; writing outside is an error.
+
+def _cells(shape, filename):
+	if filename is None:
+		return zeros(shape, dtype=uint8)
+	if os.path.exists(filename):
+		cells = open_memmap(filename, mode='r+')
+		if cells.shape != shape or cells.dtype != uint8:
+			raise ValueError('{0} holds a {1} {2} grid, not {3} uint8.'.format(filename, cells.shape, cells.dtype, shape))
+		return cells
+	return open_memmap(filename, mode='w+', dtype=uint8, shape=shape)
+
+# The part of the grid's rows and columns inside window, and where it goes in a window-sized picture.
+def _crop(grid, window):
+	(top, left, bottom, right) = window
+	rows = (max(top - grid.top, 0), min(bottom - grid.top, grid.side - 1) + 1)
+	cols = (max(left - grid.left, 0), min(right - grid.left, grid.side - 1) + 1)
+	return (rows, cols, (rows[0] + grid.top - top, cols[0] + grid.left - left))
+
+#   DenseGrid
+#   One uint8 per cell, for rules with up to 256 colours.
+class DenseGrid:
+	def __init__(self, side, filename=None):
+		self.side = side
+		self.top = -(side // 2)
+		self.left = -(side // 2)
+		self.cells = _cells((side, side), filename)
+
+	def get(self, row, col):
+		row -= self.top
+		col -= self.left
+		if 0 <= row < self.side and 0 <= col < self.side:
+			return self.cells[row, col]
+		return 0
+
+	def set(self, row, col, value):
+		if not (0 <= row - self.top < self.side and 0 <= col - self.left < self.side):
+			raise IndexError('The ant walked off the grid at y={0}, x={1}.'.format(row, col))
+		self.cells[row - self.top, col - self.left] = value
+
+	def __getitem__(self, cell):
+		return self.get(cell[0], cell[1])
+
+	def __setitem__(self, cell, value):
+		self.set(cell[0], cell[1], value)
+
+	def bounds(self):
+		return (self.top, self.left, self.top + self.side - 1, self.left + self.side - 1)
+
+	def regions(self):
+		return [self.bounds()]
+
+	def addOverlay(self, overlay):
+		overlay.paint(self.cells, self.top, self.left)
+
+	def toArray(self, window=None):
+		if window is None:
+			# a copy, as from the other grids; a view would let the caller write into the grid (or its file)
+			return (array(self.cells), (self.top, self.left))
+		picture = zeros((window[2] - window[0] + 1, window[3] - window[1] + 1), dtype=uint8)
+		(rows, cols, (down, across)) = _crop(self, window)
+		if rows[0] < rows[1] and cols[0] < cols[1]:
+			picture[down:down + rows[1] - rows[0], across:across + cols[1] - cols[0]] = self.cells[rows[0]:rows[1], cols[0]:cols[1]]
+		return (picture, (window[0], window[1]))
+
+	def nbytes(self):
+		return self.cells.nbytes
+
+#   BitGrid
+#   One bit per cell, for two-colour rules. Each row is packed eight cells to a byte, lowest bit first.
+class BitGrid:
+	def __init__(self, side, filename=None):
+		if side % 8:
+			raise ValueError('A BitGrid side must be a multiple of 8, not {0}.'.format(side))
+		self.side = side
+		self.top = -(side // 2)
+		self.left = -(side // 2)
+		self.bits = _cells((side, side // 8), filename)
+
+	def get(self, row, col):
+		row -= self.top
+		col -= self.left
+		if 0 <= row < self.side and 0 <= col < self.side:
+			return (int(self.bits[row, col >> 3]) >> (col & 7)) & 1
+		return 0
+
+	def set(self, row, col, value):
+		row -= self.top
+		col -= self.left
+		if not (0 <= row < self.side and 0 <= col < self.side):
+			raise IndexError('The ant walked off the grid at y={0}, x={1}.'.format(row + self.top, col + self.left))
+		if value == 1:
+			self.bits[row, col >> 3] |= 1 << (col & 7)
+		elif value == 0:
+			self.bits[row, col >> 3] &= ~(1 << (col & 7)) & 0xff
+		else:
+			raise ValueError('A BitGrid only holds colours 0 and 1, not {0}.'.format(value))
+
+	def __getitem__(self, cell):
+		return self.get(cell[0], cell[1])
+
+	def __setitem__(self, cell, value):
+		self.set(cell[0], cell[1], value)
+
+	def bounds(self):
+		return (self.top, self.left, self.top + self.side - 1, self.left + self.side - 1)
+
+	def regions(self):
+		return [self.bounds()]
+
+	# Only the rows and bytes the overlay covers are unpacked, a band of rows at a time.
+	def addOverlay(self, overlay, band=1024):
+		(top, left, bottom, right) = overlay.bounds()
+		firstRow = max(top - self.top, 0)
+		lastRow = min(bottom - self.top, self.side - 1)
+		firstByte = max(left - self.left, 0) >> 3
+		lastByte = min(right - self.left, self.side - 1) >> 3
+		if firstRow > lastRow or firstByte > lastByte:
+			return
+		for start in range(firstRow, lastRow + 1, band):
+			stop = min(start + band, lastRow + 1)
+			cells = unpackbits(self.bits[start:stop, firstByte:lastByte + 1], axis=1, bitorder='little')
+			overlay.paint(cells, self.top + start, self.left + 8 * firstByte)
+			if cells.max() > 1:
+				raise ValueError('A BitGrid only holds colours 0 and 1.')
+			self.bits[start:stop, firstByte:lastByte + 1] = packbits(cells, axis=1, bitorder='little')
+
+	def toArray(self, window=None):
+		if window is None:
+			return (unpackbits(self.bits, axis=1, bitorder='little'), (self.top, self.left))
+		picture = zeros((window[2] - window[0] + 1, window[3] - window[1] + 1), dtype=uint8)
+		(rows, cols, (down, across)) = _crop(self, window)
+		if rows[0] < rows[1] and cols[0] < cols[1]:
+			# unpack whole bytes, then trim to the columns wanted
+			cells = unpackbits(self.bits[rows[0]:rows[1], cols[0] >> 3:((cols[1] - 1) >> 3) + 1], axis=1, bitorder='little')
+			cells = cells[:, cols[0] & 7:(cols[0] & 7) + cols[1] - cols[0]]
+			picture[down:down + rows[1] - rows[0], across:across + cols[1] - cols[0]] = cells
+		return (picture, (window[0], window[1]))
+
+	def nbytes(self):
+		return self.bits.nbytes
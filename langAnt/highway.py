@@ -0,0 +1,213 @@
+from numpy import zeros, array, arange, int64
+from walker import Walker
+
+"""
+highway.py
+Spots when an ant has settled into a highway (or a bounded cycle) and jumps ahead instead of walking it step by step.
+@author: RedSunAtNight
+"""
+# An ant on a highway repeats the same P steps forever, shifted by the same (dRow, dCol) every time, into blank cells.
+# HighwayWalker keeps the last few thousand steps (where the ant was, which way it faced and its state, what colour it read) and every
+# checkEvery steps looks for the smallest period P for which the last `repeats` periods are identical up to that shift.
+# Before jumping it checks that the jump is exact:
+#   - the ant must have seen enough identical periods to cover every cell it comes back to from an earlier period,
+#   - cells it reads for the first time must have read blank in the last period, and must be blank all along the
+#     stretch of grid it is about to skip over.
+# Then the cells the skipped periods would have painted are laid over the grid as a HighwaySegment, which works out the
+# colour of any cell on the highway from one period's worth of cells, so skipping 10**12 steps costs no more than 10**5.
+# A period with no shift is a bounded cycle: the ant and grid come back exactly, so the steps are skipped without painting.
+
+# Periods j in [lo, hi] for which a box (given relative to origin) shifted by j*shift touches the query box.
+# Boxes are (top, left, bottom, right), inclusive.
+def periodRange(origin, shift, box, query, lo, hi):
+	for axis in (0, 1):
+		low = query[axis] - origin[axis] - box[axis + 2]
+		high = query[axis + 2] - origin[axis] - box[axis]
+		step = shift[axis]
+		if step == 0:
+			if low > 0 or high < 0:
+				return (1, 0)
+		elif step > 0:
+			lo = max(lo, -(-low // step))
+			hi = min(hi, high // step)
+		else:
+			lo = max(lo, -(-high // step))
+			hi = min(hi, low // step)
+	return (lo, hi)
+
+#   HighwaySegment
+#   The cells painted by `periods` repeats of one highway period.
+#   cells maps (row, col), relative to the ant's position at the start of the jump, to the colour the period left there.
+#   Period j (1 to periods) leaves those colours at the same cells shifted by j*shift; where periods overlap, the later one wins.
+class HighwaySegment:
+	def __init__(self, origin, shift, periods, cells):
+		self.origin = tuple(origin)
+		self.shift = tuple(shift)
+		self.periods = periods
+		self.cells = dict(cells)
+		self.relRows = array([cell[0] for cell in self.cells], dtype=int64)
+		self.relCols = array([cell[1] for cell in self.cells], dtype=int64)
+		self.values = array(list(self.cells.values()))
+		self.box = (int(self.relRows.min()), int(self.relCols.min()), int(self.relRows.max()), int(self.relCols.max()))
+
+	def get(self, row, col):
+		(lo, hi) = periodRange(self.origin, self.shift, self.box, (row, col, row, col), 1, self.periods)
+		for j in range(hi, lo - 1, -1):
+			value = self.cells.get((row - self.origin[0] - j*self.shift[0], col - self.origin[1] - j*self.shift[1]))
+			if value is not None:
+				return value
+		return None
+
+	def paint(self, tile, top, left):
+		(height, width) = tile.shape
+		(lo, hi) = periodRange(self.origin, self.shift, self.box, (top, left, top + height - 1, left + width - 1), 1, self.periods)
+		for j in range(lo, hi + 1):
+			rows = self.relRows + (self.origin[0] + j*self.shift[0] - top)
+			cols = self.relCols + (self.origin[1] + j*self.shift[1] - left)
+			inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+			tile[rows[inside], cols[inside]] = self.values[inside]
+
+	# (top, left, bottom, right) of everything the segment covers.
+	def bounds(self):
+		ends = [(self.origin[0] + j*self.shift[0], self.origin[1] + j*self.shift[1]) for j in (1, self.periods)]
+		return (min(end[0] for end in ends) + self.box[0], min(end[1] for end in ends) + self.box[1],
+			max(end[0] for end in ends) + self.box[2], max(end[1] for end in ends) + self.box[3])
+
+#   HighwayWalker
+#   A Walker that jumps ahead once it finds a highway. maxPeriod is the longest period looked for.
+#   After a run, highway is (period, dRow, dCol) of the last highway or cycle found, and skippedSteps how many steps were jumped.
+class HighwayWalker(Walker):
+	def __init__(self, rule, grid=None, position=(0, 0), direction=2, state=0, maxPeriod=1000, repeats=4, checkEvery=5000):
+		Walker.__init__(self, rule, grid, position, direction, state)
+		self.maxPeriod = maxPeriod
+		self.repeats = repeats
+		self.checkEvery = checkEvery
+		# cells checked for blankness before one jump; past this the jump is cut short and tried again later
+		self.checkLimit = 100000
+		self.highway = None
+		self.skippedSteps = 0
+		# ring buffers of the most recent steps
+		length = maxPeriod * repeats
+		self._rows = zeros(length, dtype=int64)
+		self._cols = zeros(length, dtype=int64)
+		self._dirs = zeros(length, dtype=int64) # direction + 4 * state
+		self._reads = zeros(length, dtype=int64)
+		self._next = 0
+		self._filled = 0
+
+	def step(self):
+		(row, col, facing) = (self.row, self.col, self.direction + 4 * self.state)
+		colour = Walker.step(self)
+		i = self._next
+		self._rows[i] = row
+		self._cols[i] = col
+		self._dirs[i] = facing
+		self._reads[i] = colour
+		self._next = (i + 1) % len(self._rows)
+		if self._filled < len(self._rows):
+			self._filled += 1
+		return colour
+
+	def run(self, nSteps):
+		target = self.steps + nSteps
+		while self.steps < target:
+			for i in range(0, min(self.checkEvery, target - self.steps)):
+				self.step()
+			if self.steps < target:
+				self.skipAhead(target)
+
+	# The recorded steps, oldest first: (rows, cols, direction + 4 * state, colours read).
+	def history(self):
+		order = (arange(self._filled) + self._next - self._filled) % len(self._rows)
+		return (self._rows[order], self._cols[order], self._dirs[order], self._reads[order])
+
+	# Smallest (period, dRow, dCol) the recent history repeats with, or None.
+	def findPeriod(self):
+		(rows, cols, dirs, reads) = self.history()
+		count = len(dirs)
+		longest = min(self.maxPeriod, count // self.repeats)
+		if longest < 1:
+			return None
+		lags = arange(1, longest + 1)
+		# quick filter: the last step has to match the one a period before it
+		candidates = lags[(dirs[count - 1 - lags] == dirs[-1]) & (reads[count - 1 - lags] == reads[-1])]
+		for period in candidates:
+			start = count - self.repeats * period
+			if (dirs[start + period:] != dirs[start:count - period]).any() or (reads[start + period:] != reads[start:count - period]).any():
+				continue
+			dRow = rows[-1] - rows[-1 - period]
+			dCol = cols[-1] - cols[-1 - period]
+			if (rows[start + period:] - rows[start:count - period] != dRow).any() or (cols[start + period:] - cols[start:count - period] != dCol).any():
+				continue
+			return (int(period), int(dRow), int(dCol))
+		return None
+
+	# Jump as far towards targetStep as can be proved exact. Returns the number of steps jumped.
+	def skipAhead(self, targetStep):
+		found = self.findPeriod()
+		if found is None:
+			return 0
+		(period, dRow, dCol) = found
+		wanted = (targetStep - self.steps) // period
+		if wanted < 1:
+			return 0
+		if dRow == 0 and dCol == 0:
+			periods = wanted
+		else:
+			periods = self._safePeriods(period, dRow, dCol, wanted)
+			if periods < 1:
+				return 0
+			cells = [(cell, self.grid.get(self.row + cell[0], self.col + cell[1])) for cell in self._lastPeriodCells]
+			self.grid.addOverlay(HighwaySegment((self.row, self.col), (dRow, dCol), periods, cells))
+			self.row += periods * dRow
+			self.col += periods * dCol
+			# the history is still valid, just further along the highway
+			self._rows += periods * dRow
+			self._cols += periods * dCol
+		self.highway = found
+		self.steps += periods * period
+		self.skippedSteps += periods * period
+		return periods * period
+
+	# How many of the wanted periods can be jumped exactly.
+	def _safePeriods(self, period, dRow, dCol, wanted):
+		(rows, cols, dirs, reads) = self.history()
+		firstRead = {}
+		for k in range(len(rows) - period, len(rows)):
+			cell = (int(rows[k]) - self.row, int(cols[k]) - self.col)
+			if cell not in firstRead:
+				firstRead[cell] = reads[k]
+		self._lastPeriodCells = list(firstRead)
+		box = (min(cell[0] for cell in firstRead), min(cell[1] for cell in firstRead),
+			max(cell[0] for cell in firstRead), max(cell[1] for cell in firstRead))
+		# the furthest back (in periods) the ant comes back to a cell
+		if dRow != 0:
+			furthest = (box[2] - box[0]) // abs(dRow)
+		else:
+			furthest = (box[3] - box[1]) // abs(dCol)
+		depth = 0
+		for m in range(1, furthest + 1):
+			if any((cell[0] + m*dRow, cell[1] + m*dCol) in firstRead for cell in firstRead):
+				depth = m
+		if self.repeats < depth + 2:
+			return 0
+		# cells no earlier period touched; the highway is only exact if they are blank
+		fresh = [cell for cell in firstRead if not any((cell[0] + m*dRow, cell[1] + m*dCol) in firstRead for m in range(1, depth + 1))]
+		if any(firstRead[cell] != 0 for cell in fresh):
+			return 0
+		freshBox = (min(cell[0] for cell in fresh), min(cell[1] for cell in fresh),
+			max(cell[0] for cell in fresh), max(cell[1] for cell in fresh))
+		# Only cells inside the grid's regions can be anything but blank, so only those periods need checking.
+		toCheck = set()
+		for region in self.grid.regions():
+			(lo, hi) = periodRange((self.row, self.col), (dRow, dCol), freshBox, region, 1, wanted)
+			toCheck.update(range(lo, min(hi, lo + self.checkLimit) + 1))
+		checked = 0
+		for k in sorted(toCheck):
+			checked += len(fresh)
+			if checked > self.checkLimit:
+				return k - 1
+			for cell in fresh:
+				if self.grid.get(self.row + cell[0] + k*dRow, self.col + cell[1] + k*dCol) != 0:
+					return k - 1
+		return wanted
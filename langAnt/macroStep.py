@@ -0,0 +1,102 @@
+import sys
+import time
+from collections import OrderedDict
+from numpy import array
+from tiledGrid import TiledGrid
+from walker import Walker, LANGTON
+
+"""
+macroStep.py
+Memoised macro-steps for an ant, in the spirit of HashLife.
+@author: RedSunAtNight
+"""
+# The grid is cut into small tiles (16x16 by default). What the ant does from the moment it enters a tile until it leaves
+# depends only on the tile's contents and where and which way it came in, so that whole traversal is worked out once and
+# remembered: (tile contents, entry row, entry col, direction, state) -> (tile contents afterwards, exit position, direction, state, steps).
+# The table is a bounded LRU cache; the least recently used traversal is dropped when it is full.
+# Repeated traversals - a highway crosses the same few tile states over and over - then cost one lookup instead of hundreds of steps.
+# Run this file to compare it against plain stepping: python macroStep.py [steps]
+
+#   MacroWalker
+#   Same interface as Walker. tileBits sets the tile size of the grid it makes; an existing grid keeps its own.
+#   The grid must be a TiledGrid: the cache works on whole tiles, which DenseGrid and BitGrid do not hand out.
+#   maxInner caps the steps worked out in one go, for ants that never leave a tile.
+class MacroWalker(Walker):
+	def __init__(self, rule, grid=None, position=(0, 0), direction=2, state=0, tileBits=4, cacheSize=200000):
+		if grid is None:
+			grid = TiledGrid(tileBits)
+		if not isinstance(grid, TiledGrid):
+			raise ValueError('MacroWalker needs a TiledGrid, not a {0}.'.format(type(grid).__name__))
+		Walker.__init__(self, rule, grid, position, direction, state)
+		self.cacheSize = cacheSize
+		self.cache = OrderedDict()
+		self.maxInner = 4 * grid.tileSide * grid.tileSide
+		self.hits = 0
+		self.misses = 0
+
+	def run(self, nSteps):
+		target = self.steps + nSteps
+		tileBits = self.grid.tileBits
+		while self.steps < target:
+			tile = self.grid.tileAt(self.row, self.col, True)
+			top = (self.row >> tileBits) << tileBits
+			left = (self.col >> tileBits) << tileBits
+			key = (tile.tobytes(), self.row - top, self.col - left, self.direction, self.state)
+			result = self.cache.get(key)
+			if result is None:
+				self.misses += 1
+				result = self._traverse(tile, self.row - top, self.col - left, self.direction, self.state)
+				self.cache[key] = result
+				if len(self.cache) > self.cacheSize:
+					self.cache.popitem(last=False)
+			else:
+				self.hits += 1
+				self.cache.move_to_end(key)
+			(after, exitRow, exitCol, direction, state, count) = result
+			if count > target - self.steps:
+				# the traversal would overshoot; finish one step at a time
+				Walker.run(self, target - self.steps)
+				break
+			tile[:] = after
+			self.row = top + exitRow
+			self.col = left + exitCol
+			self.direction = direction
+			self.state = state
+			self.steps += count
+
+	# Walk a copy of the tile until the ant leaves it. Positions are relative to the tile's corner.
+	def _traverse(self, tile, row, col, direction, state):
+		cells = tile.tolist()
+		side = len(cells)
+		colours = self.rule.colours
+		count = 0
+		while 0 <= row < side and 0 <= col < side and count < self.maxInner:
+			colour = cells[row][col]
+			if colour >= colours:
+				raise ValueError("Invalid value at tile position y={0}, x={1}; occurred during step {2}.".format(row, col, self.steps + count))
+			(cells[row][col], direction, dRow, dCol, state) = self.table[(state * colours + colour) * 4 + direction]
+			row += dRow
+			col += dCol
+			count += 1
+		after = array(cells, dtype=tile.dtype)
+		return (after, row, col, direction, state, count)
+
+	def stats(self):
+		lookups = self.hits + self.misses
+		return {'hits': self.hits, 'misses': self.misses, 'hitRate': float(self.hits) / lookups if lookups else 0.0,
+			'cached': len(self.cache), 'steps': self.steps}
+
+if __name__ == '__main__':
+	maxN = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+	plain = Walker(LANGTON)
+	start = time.time()
+	plain.run(maxN)
+	plainTime = time.time() - start
+	macro = MacroWalker(LANGTON)
+	start = time.time()
+	macro.run(maxN)
+	macroTime = time.time() - start
+	if (plain.row, plain.col, plain.direction, plain.state) != (macro.row, macro.col, macro.direction, macro.state):
+		raise RuntimeError('Macro-stepped ant ended up somewhere else.')
+	print('{0} steps: plain {1:.2f} s, macro {2:.2f} s, speedup {3:.1f}x'.format(maxN, plainTime, macroTime, plainTime / macroTime))
+	print(macro.stats())
@@ -0,0 +1,223 @@
+import os
+import struct
+import zlib
+from numpy import array, zeros, arange, uint8, int64, concatenate, unique, nonzero, maximum, minimum, add, diff, argsort, searchsorted
+from tiledGrid import TiledGrid
+from highway import periodRange
+
+"""
+render.py
+Headless pictures of ant grids: colours straight to pixels, written as PNG files.
+@author: RedSunAtNight
+"""
+# contourf works out a polygon around every patch of colour, which takes a long time on a big grid and needs a window
+# to show it in. Here each cell's colour is looked up in a palette to give its pixel, and the picture is written as a PNG
+# with nothing but zlib, so it works on a machine with no display.
+# Grids bigger than the picture are shrunk in blocks: each block of factor x factor cells becomes one pixel, coloured
+# with the block's most common colour ('mode'), or its highest colour ('max', which keeps thin trails visible).
+# The grid is never copied whole at full size:
+#   - DenseGrid and BitGrid are read a band of rows at a time, each band shrunk before the next is read.
+#   - A TiledGrid is counted straight into the picture. A highway segment's cells are counted in runs of periods that
+#     land on the same pixel, so a highway costs about as much as the pixels it crosses, not the cells it covers.
+#     Allocated tiles, and the few where two segments overlap, are counted one tile at a time.
+# So a highway run of 10**12 steps renders about as quickly as one of 10**6. The default window is everything the grid
+# has written; the cost grows with the number of allocated tiles in the window, not with its area.
+# snapshots() runs an ant and saves a frame every so many steps, for time-lapses of long runs.
+
+# Palettes matching the two scripts. Any (colours, 3) list of 0-255 RGB values will do.
+TWOCOLOR = array([(255, 255, 255), (0, 0, 0)], dtype=uint8)
+FOURCOLOR = array([(0, 0, 255), (0, 128, 0), (255, 255, 0), (255, 0, 0)], dtype=uint8)
+
+def toRGB(cells, palette):
+	palette = array(palette, dtype=uint8)
+	if cells.size and cells.max() >= len(palette):
+		raise ValueError('Colour {0} is not in the {1}-colour palette.'.format(cells.max(), len(palette)))
+	return palette[cells]
+
+# Shrink cells by factor in both directions, padding the edges with blank cells.
+def downsample(cells, factor, how='mode'):
+	if factor <= 1:
+		return cells
+	(height, width) = cells.shape
+	padded = zeros((-(-height // factor) * factor, -(-width // factor) * factor), dtype=cells.dtype)
+	padded[:height, :width] = cells
+	blocks = padded.reshape(padded.shape[0] // factor, factor, padded.shape[1] // factor, factor)
+	if how == 'max':
+		return blocks.max(axis=(1, 3))
+	if how != 'mode':
+		raise ValueError('Unknown downsampling "{0}"; use "mode" or "max".'.format(how))
+	counts = array([(blocks == colour).sum(axis=(1, 3)) for colour in range(0, int(cells.max()) + 1)])
+	# ties go to the lower colour, so blank wins a tie
+	return counts.argmax(axis=0).astype(cells.dtype)
+
+def writePNG(filename, rgb, level=6):
+	(height, width) = rgb.shape[:2]
+	# every row starts with filter type 0
+	raw = concatenate((zeros((height, 1), dtype=uint8), rgb.reshape(height, width * 3)), axis=1).tobytes()
+	def chunk(kind, data):
+		return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+	with open(filename, 'wb') as picture:
+		picture.write(b'\x89PNG\r\n\x1a\n')
+		picture.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+		picture.write(chunk(b'IDAT', zlib.compress(raw, level)))
+		picture.write(chunk(b'IEND', b''))
+
+# Periods j in (lo, hi] where (start + j*step) // size differs from what it was at period j - 1.
+def _changes(start, step, size, lo, hi):
+	if step == 0 or hi <= lo:
+		return zeros(0, dtype=int64)
+	first = (start + lo * step) // size
+	last = (start + hi * step) // size
+	if step > 0:
+		return -((start - arange(first + 1, last + 1, dtype=int64) * size) // step)
+	return (arange(last + 1, first + 1, dtype=int64) * size - start) // step + 1
+
+# Periods j in [lo, hi] for which a cell starting at origin and moving by shift each period is inside each box
+# (an (n, 4) array of top, left, bottom, right): periodRange for many boxes at once. Returns (firsts, lasts).
+def _periodRanges(origin, shift, boxes, lo, hi):
+	firsts = zeros(len(boxes), dtype=int64) + lo
+	lasts = zeros(len(boxes), dtype=int64) + hi
+	for axis in (0, 1):
+		low = boxes[:, axis] - origin[axis]
+		high = boxes[:, axis + 2] - origin[axis]
+		step = shift[axis]
+		if step == 0:
+			lasts[(low > 0) | (high < 0)] = lo - 1
+		elif step > 0:
+			firsts = maximum(firsts, -(-low // step))
+			lasts = minimum(lasts, high // step)
+		else:
+			firsts = maximum(firsts, -(-high // step))
+			lasts = minimum(lasts, low // step)
+	return (firsts, lasts)
+
+# (row, col, colour, lo, hi) for each cell of a segment's period: it starts at (row, col), and periods lo to hi leave
+# it showing in window (a later period painting the same place wins, so some cells only show in the last few).
+def _showingCells(segment, window):
+	shift = segment.shift
+	# how far back a later period can come over a cell an earlier one painted
+	reach = min([(segment.box[axis + 2] - segment.box[axis]) // abs(shift[axis]) for axis in (0, 1) if shift[axis]] or [0])
+	for (cell, value) in segment.cells.items():
+		later = [k for k in range(1, reach + 1) if (cell[0] - k * shift[0], cell[1] - k * shift[1]) in segment.cells]
+		lo = segment.periods - later[0] + 1 if later else 1
+		(lo, hi) = periodRange(segment.origin, shift, (cell[0], cell[1], cell[0], cell[1]), window, max(lo, 1), segment.periods)
+		if lo <= hi:
+			yield (segment.origin[0] + cell[0], segment.origin[1] + cell[1], int(value), lo, hi)
+
+# Periods in [lo, hi] at which a cell starting at (row, col) moves into a new size x size block, counted from (top, left).
+def _blockStarts(row, col, shift, lo, hi, size, top, left):
+	return concatenate(([lo], _changes(row - top, shift[0], size, lo, hi), _changes(col - left, shift[1], size, lo, hi)))
+
+# Tiles in which the segment shows at least one cell inside box.
+def _touchedTiles(segment, box, tileBits):
+	touched = set()
+	for (row, col, value, lo, hi) in _showingCells(segment, box):
+		starts = unique(_blockStarts(row, col, segment.shift, lo, hi, 1 << tileBits, 0, 0))
+		touched.update(zip(((row + starts * segment.shift[0]) >> tileBits).tolist(), ((col + starts * segment.shift[1]) >> tileBits).tolist()))
+	return touched
+
+# Count the segment's cells in window into the picture, a run of periods on one pixel at a time, leaving out the
+# cells inside exactBoxes (an (n, 4) array), which are counted separately.
+def _addSegment(picture, segment, window, factor, exactBoxes, how):
+	shift = segment.shift
+	for (row, col, value, lo, hi) in _showingCells(segment, window):
+		if value == 0:
+			continue
+		(firsts, lasts) = _periodRanges((row, col), shift, exactBoxes, lo, hi)
+		hit = firsts <= lasts
+		(firsts, lasts) = (firsts[hit], lasts[hit])
+		starts = unique(concatenate((_blockStarts(row, col, shift, lo, hi, factor, window[0], window[1]), firsts, lasts + 1)))
+		starts = starts[starts <= hi]
+		counts = diff(concatenate((starts, [hi + 1])))
+		if len(firsts):
+			# a cell is in one tile at a time, so the stretches it spends in exact tiles do not overlap
+			order = argsort(firsts)
+			(firsts, lasts) = (firsts[order], lasts[order])
+			which = searchsorted(firsts, starts, 'right') - 1
+			keep = (which < 0) | (starts > lasts[maximum(which, 0)])
+			(starts, counts) = (starts[keep], counts[keep])
+		_accumulate(picture, (row + starts * shift[0] - window[0]) // factor, (col + starts * shift[1] - window[1]) // factor,
+			counts, zeros(len(starts), dtype=int64) + value, how)
+
+# Add cells at pixels (rows, cols) to the per-colour counts, or the highest colours.
+def _accumulate(picture, rows, cols, counts, colours, how):
+	keep = colours > 0
+	if how == 'max':
+		maximum.at(picture, (rows[keep], cols[keep]), colours[keep])
+	else:
+		add.at(picture, (colours[keep], rows[keep], cols[keep]), counts[keep])
+
+# Shrink window of a TiledGrid without copying it.
+def _reduceTiled(grid, window, factor, how, palette):
+	(height, width) = (-(-(window[2] - window[0] + 1) // factor), -(-(window[3] - window[1] + 1) // factor))
+	picture = zeros((height, width), dtype=uint8) if how == 'max' else zeros((len(palette), height, width), dtype=int64)
+	bits = grid.tileBits
+	# tiles counted exactly: the allocated ones, and those where two segments both show cells
+	exact = set(key for key in grid.tiles if window[0] >> bits <= key[0] <= window[2] >> bits and window[1] >> bits <= key[1] <= window[3] >> bits)
+	for (i, older) in enumerate(grid.overlays):
+		for newer in grid.overlays[i + 1:]:
+			(first, second) = (older.bounds(), newer.bounds())
+			box = (max(first[0], second[0], window[0]), max(first[1], second[1], window[1]),
+				min(first[2], second[2], window[2]), min(first[3], second[3], window[3]))
+			if box[0] <= box[2] and box[1] <= box[3]:
+				exact.update(_touchedTiles(older, box, bits) & _touchedTiles(newer, box, bits))
+	side = 1 << bits
+	exactBoxes = array([(key[0] << bits, key[1] << bits, (key[0] << bits) + side - 1, (key[1] << bits) + side - 1) for key in exact], dtype=int64).reshape(len(exact), 4)
+	for segment in grid.overlays:
+		_addSegment(picture, segment, window, factor, exactBoxes, how)
+	for key in exact:
+		tile = grid.tiles.get(key)
+		if tile is None:
+			tile = grid.newTile(key)
+		(rows, cols) = nonzero(tile)
+		rows = rows + (key[0] << bits)
+		cols = cols + (key[1] << bits)
+		inside = (rows >= window[0]) & (rows <= window[2]) & (cols >= window[1]) & (cols <= window[3])
+		(rows, cols) = (rows[inside], cols[inside])
+		_accumulate(picture, (rows - window[0]) // factor, (cols - window[1]) // factor, zeros(len(rows), dtype=int64) + 1,
+			tile[rows - (key[0] << bits), cols - (key[1] << bits)].astype(int64), how)
+	if how == 'max':
+		return picture
+	# everything not counted is blank, including the padding past the window's edge, as in downsample
+	picture[0] = factor * factor - picture[1:].sum(axis=0)
+	return picture.argmax(axis=0).astype(uint8)
+
+# Shrink window of any grid a band of rows at a time, so no more than about `cells` cells are copied at once.
+def _reduceBands(grid, window, factor, how, cells=1 << 24):
+	width = window[3] - window[1] + 1
+	rowsPerBand = max(cells // (factor * width), 1) * factor
+	bands = []
+	for top in range(window[0], window[2] + 1, rowsPerBand):
+		(band, corner) = grid.toArray((top, window[1], min(top + rowsPerBand - 1, window[2]), window[3]))
+		bands.append(downsample(band, factor, how))
+	return concatenate(bands)
+
+# Write a PNG of the grid no bigger than maxSize pixels on a side.
+# window = (top, left, bottom, right) picks the cells to draw; by default everything the grid holds.
+def renderGrid(grid, filename, palette=TWOCOLOR, maxSize=1024, window=None, how='mode'):
+	if how not in ('mode', 'max'):
+		raise ValueError('Unknown downsampling "{0}"; use "mode" or "max".'.format(how))
+	if window is None:
+		window = grid.bounds() or (0, 0, 0, 0)
+	factor = -(-max(window[2] - window[0] + 1, window[3] - window[1] + 1) // maxSize)
+	if isinstance(grid, TiledGrid):
+		cells = _reduceTiled(grid, window, factor, how, palette)
+	else:
+		cells = _reduceBands(grid, window, factor, how)
+	writePNG(filename, toRGB(cells, palette))
+	return factor
+
+# Run the ant for nSteps, saving frame_000000.png, frame_000001.png, ... into directory every `every` steps.
+# window fixes the area drawn so all the frames line up; by default each frame shows the whole grid at that moment.
+def snapshots(ant, nSteps, every, directory, palette=TWOCOLOR, maxSize=1024, window=None, how='mode'):
+	if not os.path.isdir(directory):
+		os.makedirs(directory)
+	target = ant.steps + nSteps
+	frames = []
+	while True:
+		filename = os.path.join(directory, 'frame_{0:06d}.png'.format(len(frames)))
+		renderGrid(ant.grid, filename, palette, maxSize, window, how)
+		frames.append(filename)
+		if ant.steps >= target:
+			return frames
+		ant.run(min(every, target - ant.steps))
@@ -0,0 +1,139 @@
+import os
+import sys
+import json
+import time
+from itertools import product
+from multiprocessing import Pool
+from numpy import nonzero, array_equal, fliplr, flipud, rot90
+from highway import HighwayWalker
+
+"""
+ruleSurvey.py
+Surveys every multi-colour ant rule up to a given length and sorts them into highway-forming, cycling, symmetric or chaotic.
+@author: RedSunAtNight
+"""
+# Rules are strings over the turn letters (see turmite.py), "LR" by default, so length 4 covers four-colour rules like
+# "LRRL" alongside antwalkerColors.py's hand-picked one; pass "LRNU" to include straight-on and U-turn colours too. Rules that must behave the same as one already in the list are left out:
+#   - a rule made of a shorter rule repeated ("LRLR" is "LR" twice) walks exactly like the shorter rule,
+#   - swapping L and R gives the mirror image of the same pattern, so only one of each pair is kept.
+# Each rule runs on a HighwayWalker in a pool of processes, and stops as soon as it is proved to build a highway
+# (a period that moves the ant) or to cycle (a period that does not). A rule that gets to maxSteps without either is
+# called symmetric if, in the second half of its run, the ant came back to its starting cell and found the pattern
+# it had drawn looked the same after a flip or a half turn; otherwise it is chaotic.
+# Every result is appended to the index file (one JSON object per line) as soon as it is known, so a survey that is
+# stopped can be started again with the same index file and it carries on with the rules not done yet.
+# Usage: python ruleSurvey.py maxLength [index file] [maxSteps] [processes] [letters]
+
+MIRROR = {'L': 'R', 'R': 'L', 'N': 'N', 'U': 'U'}
+
+def mirror(rule):
+	return ''.join(MIRROR[letter] for letter in rule)
+
+# True if the rule is not a shorter rule repeated.
+def isPrimitive(rule):
+	length = len(rule)
+	return not any(length % size == 0 and rule[:size] * (length // size) == rule for size in range(1, length))
+
+# Every rule from 2 to maxLength colours, keeping one of each mirror pair and no repeated rules.
+def enumerateRules(maxLength, letters='LR'):
+	rules = []
+	for length in range(2, maxLength + 1):
+		for letterList in product(letters, repeat=length):
+			rule = ''.join(letterList)
+			if isPrimitive(rule) and rule <= mirror(rule):
+				rules.append(rule)
+	return rules
+
+def isSymmetric(grid):
+	(cells, corner) = grid.toArray()
+	(rows, cols) = nonzero(cells)
+	if not len(rows):
+		return True
+	cells = cells[rows.min():rows.max() + 1, cols.min():cols.max() + 1]
+	flips = [fliplr(cells), flipud(cells), rot90(cells, 2)]
+	if cells.shape[0] == cells.shape[1]:
+		flips.extend([cells.T, rot90(cells, 2).T])
+	return any(array_equal(cells, flipped) for flipped in flips)
+
+# Run one rule until it is classified or reaches maxSteps. Returns a dict ready for the index.
+def classify(rule, maxSteps=200000, checkEvery=5000):
+	start = time.time()
+	ant = HighwayWalker(rule, checkEvery=checkEvery)
+	label = None
+	found = None
+	# Symmetric rules draw a symmetric pattern whenever the ant comes back to where it started, so look then
+	# (at most once every thousand steps; the pattern does not change much in between).
+	lastChecked = 0
+	lastSymmetric = 0
+	while ant.steps < maxSteps and label is None:
+		for i in range(0, min(checkEvery, maxSteps - ant.steps)):
+			ant.step()
+			if ant.row == 0 and ant.col == 0 and ant.steps - lastChecked >= 1000:
+				lastChecked = ant.steps
+				if isSymmetric(ant.grid):
+					lastSymmetric = ant.steps
+		found = ant.findPeriod()
+		if found is not None:
+			(period, dRow, dCol) = found
+			# only believe it once a jump along it has been proved exact
+			if ant.skipAhead(ant.steps + 1000 * period) > 0:
+				label = 'cycle' if dRow == 0 and dCol == 0 else 'highway'
+	if label is None:
+		found = None
+		label = 'symmetric' if lastSymmetric >= ant.steps // 2 else 'chaotic'
+	result = {'rule': rule, 'label': label, 'steps': ant.steps - ant.skippedSteps, 'seconds': round(time.time() - start, 3)}
+	if found is not None:
+		result['period'] = found[0]
+		result['shift'] = [found[1], found[2]]
+	return result
+
+def _classify(job):
+	return classify(*job)
+
+# Rules already in the index file.
+def readIndex(filename):
+	done = {}
+	if os.path.exists(filename):
+		with open(filename) as index:
+			for line in index:
+				try:
+					result = json.loads(line)
+				except ValueError:
+					# a line cut short when a survey was killed; that rule just runs again
+					continue
+				done[result['rule']] = result
+	return done
+
+def _endsWithNewline(filename):
+	with open(filename, 'rb') as index:
+		index.seek(-1, os.SEEK_END)
+		return index.read(1) == b'\n'
+
+# Classify every rule up to maxLength that is not in the index yet. Returns the whole index as {rule: result}.
+def survey(maxLength, indexFile, maxSteps=200000, processes=None, letters='LR'):
+	done = readIndex(indexFile)
+	jobs = [(rule, maxSteps) for rule in enumerateRules(maxLength, letters) if rule not in done]
+	pool = Pool(processes)
+	try:
+		with open(indexFile, 'a') as index:
+			if index.tell() and not _endsWithNewline(indexFile):
+				index.write('\n')
+			for result in pool.imap_unordered(_classify, jobs):
+				index.write(json.dumps(result) + '\n')
+				index.flush()
+				done[result['rule']] = result
+	finally:
+		pool.terminate()
+	return done
+
+if __name__ == '__main__':
+	maxLength = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+	indexFile = sys.argv[2] if len(sys.argv) > 2 else 'ruleSurvey.jsonl'
+	maxSteps = int(sys.argv[3]) if len(sys.argv) > 3 else 200000
+	processes = int(sys.argv[4]) if len(sys.argv) > 4 else None
+	letters = sys.argv[5] if len(sys.argv) > 5 else 'LR'
+	results = survey(maxLength, indexFile, maxSteps, processes, letters)
+	counts = {}
+	for result in results.values():
+		counts[result['label']] = counts.get(result['label'], 0) + 1
+	print('{0} rules: {1}'.format(len(results), counts))
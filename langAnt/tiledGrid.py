@@ -0,0 +1,114 @@
+from numpy import zeros, uint8
+
+"""
+tiledGrid.py
+An unbounded grid for the ants to walk on.
+@author: RedSunAtNight
+"""
+# The grid is cut into square tiles of side 2**tileBits. A tile is only allocated the first time a cell in it is written,
+# so memory grows with the area the ant has actually visited, and any cell can be reached - row and column are plain Python ints.
+# Cells that have never been written read as zero.
+# Use grid[row, col] (or get/set) to read and write cells; toArray() gives a dense copy of the visited part for plotting.
+# gridStorage.py has fixed-size grids with the same interface.
+# Overlays are read-only layers underneath the tiles, used for regions that are known without ever having been walked
+# (see highway.py). They need get(row, col), returning None where they have nothing to say, and paint(tile, top, left).
+
+class TiledGrid:
+	def __init__(self, tileBits=6, dtype=uint8):
+		self.tileBits = tileBits
+		self.tileSide = 1 << tileBits
+		self.mask = self.tileSide - 1
+		self.dtype = dtype
+		self.tiles = {} # (tile row, tile col) -> tileSide x tileSide array
+		self.overlays = [] # the newest overlay wins where they overlap
+		# The ant spends many steps in one tile, so remember the last one looked up.
+		self._lastKey = None
+		self._lastTile = None
+
+	# The tile holding cell (row, col), or None if it has not been allocated and allocate is False.
+	def tileAt(self, row, col, allocate=False):
+		key = (row >> self.tileBits, col >> self.tileBits)
+		if key == self._lastKey:
+			return self._lastTile
+		tile = self.tiles.get(key)
+		if tile is None:
+			if not allocate:
+				return None
+			tile = self.newTile(key)
+			self.tiles[key] = tile
+		self._lastKey = key
+		self._lastTile = tile
+		return tile
+
+	# A fresh tile for the given tile coordinates, with whatever the overlays say is in it.
+	def newTile(self, key):
+		tile = zeros((self.tileSide, self.tileSide), dtype=self.dtype)
+		for overlay in self.overlays:
+			overlay.paint(tile, key[0] << self.tileBits, key[1] << self.tileBits)
+		return tile
+
+	def get(self, row, col):
+		tile = self.tileAt(row, col)
+		if tile is None:
+			for overlay in reversed(self.overlays):
+				value = overlay.get(row, col)
+				if value is not None:
+					return value
+			return 0
+		return tile[row & self.mask, col & self.mask]
+
+	# Lay an overlay over everything written so far.
+	def addOverlay(self, overlay):
+		for (tileRow, tileCol), tile in self.tiles.items():
+			overlay.paint(tile, tileRow << self.tileBits, tileCol << self.tileBits)
+		self.overlays.append(overlay)
+
+	def set(self, row, col, value):
+		self.tileAt(row, col, True)[row & self.mask, col & self.mask] = value
+
+	def __getitem__(self, cell):
+		return self.get(cell[0], cell[1])
+
+	def __setitem__(self, cell, value):
+		self.set(cell[0], cell[1], value)
+
+	# (minRow, minCol, maxRow, maxCol) of the allocated tiles, inclusive. None if nothing has been written.
+	def bounds(self):
+		if not self.tiles:
+			return None
+		tileRows = [key[0] for key in self.tiles]
+		tileCols = [key[1] for key in self.tiles]
+		return (min(tileRows) << self.tileBits, min(tileCols) << self.tileBits,
+			((max(tileRows) + 1) << self.tileBits) - 1, ((max(tileCols) + 1) << self.tileBits) - 1)
+
+	# Boxes (top, left, bottom, right) outside which every cell is blank: the allocated tiles and the overlays.
+	def regions(self):
+		side = self.tileSide
+		boxes = [(tileRow * side, tileCol * side, tileRow * side + side - 1, tileCol * side + side - 1) for (tileRow, tileCol) in self.tiles]
+		boxes.extend(overlay.bounds() for overlay in self.overlays)
+		return boxes
+
+	# Dense copy of the cells in window = (top, left, bottom, right), by default every allocated tile.
+	# Returns (array, (row, col) of array[0][0]).
+	def toArray(self, window=None):
+		if window is None:
+			window = self.bounds()
+			if window is None:
+				return (zeros((1, 1), dtype=self.dtype), (0, 0))
+		(minRow, minCol, maxRow, maxCol) = window
+		picture = zeros((maxRow - minRow + 1, maxCol - minCol + 1), dtype=self.dtype)
+		for overlay in self.overlays:
+			overlay.paint(picture, minRow, minCol)
+		(height, width) = picture.shape
+		side = self.tileSide
+		for (tileRow, tileCol), tile in self.tiles.items():
+			top = (tileRow << self.tileBits) - minRow
+			left = (tileCol << self.tileBits) - minCol
+			if top >= height or left >= width or top + side <= 0 or left + side <= 0:
+				continue
+			picture[max(top, 0):top + side, max(left, 0):left + side] = tile[max(-top, 0):height - top, max(-left, 0):width - left]
+		return (picture, (minRow, minCol))
+
+	# Bytes used by cell storage.
+	def nbytes(self):
+		return sum(tile.nbytes for tile in self.tiles.values())
@@ -0,0 +1,102 @@
+import re
+from ast import literal_eval
+from numpy import array, int64, uint8
+
+"""
+turmite.py
+Compiles ant rules - from a short rule string up to a full turmite state table - into transition tables.
+@author: RedSunAtNight
+"""
+# A turmite is an ant with an internal state. Each (state, colour) pair says what colour to paint, how to turn, and
+# which state to go to next. Rule accepts:
+#   "LR", "RLLR", ...    one turn letter per colour; colour c is painted c+1 (wrapping to 0), one state.
+#   "L R NL UR"          the same, with tokens split on spaces or commas, so a colour can turn and move more than once.
+#                        "NL" is antwalkerColors.py's step forward, then turn left and move again.
+#   "{{{1, 8, 1}, ...}}" Golly-style turmite tables: {{{colour, turn, state}, ...one per colour}, ...one per state},
+#                        with turns coded 1 = no turn, 2 = right, 4 = U-turn, 8 = left.
+#   [[(1, "L", 1), ...], ...]   the same table as Python lists, with turns as letters, ints or tuples of ints.
+# Turn letters: L = left, R = right, N = no turn, U = U-turn. As in turn_move, a turn of 1 is left and -1 is right.
+# Directions are 0=up, 1=left, 2=down, 3=right.
+#
+# Every (state, colour, direction) is then compiled to a single transition - new colour, new direction, row move,
+# column move, new state - so a step is one table lookup with no branching.
+
+# How row and column change when moving one cell in each direction.
+DELTAS = ((-1, 0), (0, -1), (1, 0), (0, 1))
+TURNS = {'L': 1, 'R': -1, 'N': 0, 'U': 2}
+GOLLYTURNS = {1: 0, 2: -1, 4: 2, 8: 1}
+
+def _turns(turn):
+	if isinstance(turn, str):
+		try:
+			return tuple(TURNS[letter] for letter in turn.upper())
+		except KeyError:
+			raise ValueError('Unknown turn "{0}"; use the letters L, R, N and U.'.format(turn))
+	if isinstance(turn, int):
+		return (turn,)
+	return tuple(turn)
+
+# The rule as table[state][colour] = (new colour, turns, new state).
+def parseRule(rule):
+	if isinstance(rule, str):
+		text = rule.strip()
+		if text.startswith('{'):
+			try:
+				states = literal_eval(text.replace('{', '[').replace('}', ']'))
+			except (SyntaxError, ValueError):
+				raise ValueError('Cannot read turmite table "{0}".'.format(rule))
+			table = []
+			for row in states:
+				for (newColour, turn, newState) in row:
+					if turn not in GOLLYTURNS:
+						raise ValueError('Unknown turn code {0} in turmite table.'.format(turn))
+				table.append([(newColour, (GOLLYTURNS[turn],), newState) for (newColour, turn, newState) in row])
+			return table
+		if re.search(r'[\s,]', text):
+			tokens = [token for token in re.split(r'[\s,]+', text) if token]
+		else:
+			tokens = list(text)
+		if not tokens:
+			raise ValueError('Empty rule.')
+		return [[((colour + 1) % len(tokens), _turns(token), 0) for colour, token in enumerate(tokens)]]
+	return [[(entry[0], _turns(entry[1]), entry[2]) for entry in row] for row in rule]
+
+#   Rule
+#   A compiled rule. table is a flat list indexed by index(state, colour, direction), each entry
+#   (new colour, new direction, row move, col move, new state). The same columns are also kept as numpy arrays
+#   (newColour, newDirection, rowMove, colMove, newState) for engines that step many ants at once.
+class Rule:
+	def __init__(self, rule):
+		if isinstance(rule, Rule):
+			rule = rule.source
+		self.source = rule
+		transitions = parseRule(rule)
+		self.states = len(transitions)
+		self.colours = len(transitions[0])
+		for row in transitions:
+			if len(row) != self.colours:
+				raise ValueError('Every state needs an entry for each of the {0} colours.'.format(self.colours))
+			for (newColour, turns, newState) in row:
+				if not 0 <= newColour < self.colours or not 0 <= newState < self.states:
+					raise ValueError('Transition to colour {0}, state {1} is outside the table.'.format(newColour, newState))
+		self.table = []
+		for row in transitions:
+			for (newColour, turns, newState) in row:
+				for direction in range(0, 4):
+					(newDirection, dRow, dCol) = (direction, 0, 0)
+					for turn in turns:
+						newDirection = (newDirection + turn) % 4
+						dRow += DELTAS[newDirection][0]
+						dCol += DELTAS[newDirection][1]
+					self.table.append((newColour, newDirection, dRow, dCol, newState))
+		self.newColour = array([entry[0] for entry in self.table], dtype=uint8)
+		self.newDirection = array([entry[1] for entry in self.table], dtype=int64)
+		self.rowMove = array([entry[2] for entry in self.table], dtype=int64)
+		self.colMove = array([entry[3] for entry in self.table], dtype=int64)
+		self.newState = array([entry[4] for entry in self.table], dtype=int64)
+
+	def index(self, state, colour, direction):
+		return (state * self.colours + colour) * 4 + direction
+
+	def __repr__(self):
+		return 'Rule({0!r})'.format(self.source)
@@ -0,0 +1,48 @@
+from tiledGrid import TiledGrid
+from turmite import Rule
+
+"""
+walker.py
+One ant on a TiledGrid, with its rule given as data instead of an if/elif chain.
+@author: RedSunAtNight
+"""
+# The rule can be anything turmite.Rule accepts: a rule string like "LR", or a full turmite table with internal states.
+# Directions are the same as in the scripts: 0=up, 1=left, 2=down, 3=right.
+
+# antwalker.py: turn left on 0, right on 1.
+LANGTON = "LR"
+# antwalkerColors.py: left, right, forward-then-left, U-turn-then-right.
+FOURCOLOR = "L R NL UR"
+
+class Walker:
+	def __init__(self, rule, grid=None, position=(0, 0), direction=2, state=0):
+		self.rule = Rule(rule)
+		self.table = self.rule.table
+		if grid is None:
+			grid = TiledGrid()
+		self.grid = grid
+		(self.row, self.col) = position
+		self.direction = direction
+		self.state = state
+		self.steps = 0
+
+	# Take one step. Returns the colour the ant was standing on.
+	def step(self):
+		# a Python int: a numpy uint8 colour would make the table index below wrap at 256
+		colour = int(self.grid.get(self.row, self.col))
+		if colour >= self.rule.colours:
+			raise ValueError("Invalid value at grid position y={0}, x={1}; occurred during step {2}.".format(self.row, self.col, self.steps))
+		(newColour, self.direction, dRow, dCol, self.state) = self.table[(self.state * self.rule.colours + colour) * 4 + self.direction]
+		self.grid.set(self.row, self.col, newColour)
+		self.row += dRow
+		self.col += dCol
+		self.steps += 1
+		return colour
+
+	def run(self, nSteps):
+		for i in range(0, nSteps):
+			self.step()
+
+	# Walk until the ant has taken targetStep steps in total.
+	def runTo(self, targetStep):
+		self.run(targetStep - self.steps)
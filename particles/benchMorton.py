@@ -0,0 +1,60 @@
+#! usr/bin/env python
+import sys
+import time
+from pprint import pprint
+import numpy as np
+from particleClasses import Particle
+from particleArrays import ParticleArrays
+
+'''
+benchMorton.py
+@author: RedSunAtNight
+Shows how much Morton reordering helps the array-backed force loops.
+Builds the same system twice, once with its storage shuffled randomly and once in Z-order, and times the interaction passes on each.
+Usage: python benchMorton.py [particle count] [cutoff]
+The all-pairs path is only timed for systems small enough to hold an N x N matrix.
+'''
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+cutoff = float(sys.argv[2]) if len(sys.argv) > 2 else 1.5
+iterations = 5
+maxAllPairs = 3000
+
+# Particles spread evenly through a cube, about one per unit volume.
+rng = np.random.default_rng(12)
+side = count**(1./3)
+partls = []
+for i in range(0, count):
+    partl = Particle()
+    partl.charge = "negative" if i % 2 else "positive"
+    partl.position = list(rng.uniform(0, side, 3))
+    partls.append(partl)
+
+def timeIt(function):
+    best = None
+    for i in range(0, iterations):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+timesDict = {}
+shuffled = ParticleArrays(partls)
+ordered = ParticleArrays(partls)
+ordered.reorder()
+for name, system in (('shuffled', shuffled), ('morton', ordered)):
+    timesDict[name] = {'cutoff': timeIt(lambda: system.interactCutoff(cutoff))}
+    if count <= maxAllPairs:
+        timesDict[name]['allpairs'] = timeIt(system.interact)
+
+# Both orderings must give the same physics, particle for particle.
+shuffled.interactCutoff(cutoff)
+ordered.interactCutoff(cutoff)
+if not np.allclose(shuffled.acceleration[shuffled.slots], ordered.acceleration[ordered.slots]):
+    raise RuntimeError('Reordered system does not match the original.')
+
+for key in timesDict['morton']:
+    timesDict['speedup ' + key] = timesDict['shuffled'][key] / timesDict['morton'][key]
+pprint(timesDict)
@@ -0,0 +1,69 @@
+#! usr/bin/env python
+import sys
+import time
+from pprint import pprint
+import numpy as np
+from particleClasses import Particle, Gravitator, PairCoefficients
+from particleArrays import ParticleArrays
+
+'''
+benchPairCoeffs.py
+@author: RedSunAtNight
+Shows how much the cached pair coefficients save over working them out again for every pair on every step.
+Times a full interaction pass three ways:
+    'particles' / 'gravitators': each particle's own interact() (three sqrts and a division per pair) against PairCoefficients.interact()
+    'arrays': ParticleArrays.interact() with its coefficient matrix rebuilt every call, as it used to be, against the cached one
+Usage: python benchPairCoeffs.py [particle count] [array particle count]
+'''
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+arrayCount = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+iterations = 5
+
+rng = np.random.default_rng(12)
+def spread(partls, side):
+    for partl in partls:
+        partl.position = list(rng.uniform(0, side, 3))
+        partl.mass = float(rng.uniform(1., 10.))
+    return partls
+
+def makeParticles(number):
+    partls = [Particle() for i in range(0, number)]
+    for i, partl in enumerate(partls):
+        partl.charge = "negative" if i % 2 else "positive"
+    return spread(partls, number**(1./3))
+
+def timeIt(function):
+    best = None
+    for i in range(0, iterations):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def perParticle(partls):
+    for partl in partls:
+        partl.interact([otherPartl for otherPartl in partls if otherPartl is not partl])
+
+timesDict = {}
+for name, partls in (('particles', makeParticles(count)), ('gravitators', spread([Gravitator(1.) for i in range(0, count)], count**(1./3)))):
+    cached = PairCoefficients(partls)
+    timesDict[name] = {'current': timeIt(lambda: perParticle(partls)), 'cached': timeIt(cached.interact)}
+    # Both must give the same accelerations.
+    perParticle(partls)
+    before = np.array([partl.acceleration for partl in partls])
+    cached.interact()
+    if not np.allclose(before, np.array([partl.acceleration for partl in partls]), rtol=1e-9, atol=0):
+        raise RuntimeError('Cached coefficients do not match the per-particle path for {0}.'.format(name))
+
+system = ParticleArrays(makeParticles(arrayCount))
+def rebuilt():
+    system._allPairs = None
+    system.interact()
+timesDict['arrays'] = {'current': timeIt(rebuilt), 'cached': timeIt(system.interact)}
+
+for key in ('particles', 'gravitators', 'arrays'):
+    timesDict['speedup ' + key] = timesDict[key]['current'] / timesDict[key]['cached']
+pprint(timesDict)
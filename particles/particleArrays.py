@@ -0,0 +1,231 @@
+import numpy as np
+
+'''
+particleArrays.py
+@author: RedSunAtNight
+
+class ParticleArrays
+    Holds a whole system of particles (from particleClasses.py) as numpy arrays, so every interaction in a timestep is done at once.
+    Storage can be reordered along a Morton (Z-order) curve every few steps, so particles that are close in space are close in memory.
+    Each particle keeps a stable ID (its index in the list the system was built from), so trajectories and the original Particle handles still match up after reordering.
+
+functions mortonKeys and mortonOrder
+    Compute Z-order keys for a set of positions, and the storage order that sorts them along the curve.
+'''
+
+# Spread the lowest 21 bits of each value so there are two zero bits between each of them.
+def _spreadBits(values):
+    values = values.astype(np.uint64) & np.uint64(0x1fffff)
+    values = (values | (values << np.uint64(32))) & np.uint64(0x1f00000000ffff)
+    values = (values | (values << np.uint64(16))) & np.uint64(0x1f0000ff0000ff)
+    values = (values | (values << np.uint64(8))) & np.uint64(0x100f00f00f00f00f)
+    values = (values | (values << np.uint64(4))) & np.uint64(0x10c30c30c30c30c3)
+    values = (values | (values << np.uint64(2))) & np.uint64(0x1249249249249249)
+    return values
+
+# Morton key of each position. positions is an (N, 3) array; each axis is quantised to 2**bits cells across the bounding box.
+def mortonKeys(positions, bits=10):
+    if bits < 1 or bits > 21:
+        raise ValueError('Morton keys need between 1 and 21 bits per axis, not {0}.'.format(bits))
+    positions = np.asarray(positions, dtype=float)
+    low = positions.min(axis=0)
+    span = positions.max(axis=0) - low
+    span[span == 0] = 1.
+    cells = ((positions - low) / span * ((1 << bits) - 1)).astype(np.uint64)
+    return _spreadBits(cells[:, 0]) | (_spreadBits(cells[:, 1]) << np.uint64(1)) | (_spreadBits(cells[:, 2]) << np.uint64(2))
+
+# The permutation that puts positions in Z-order. Stable, so particles sharing a key keep their relative order.
+def mortonOrder(positions, bits=10):
+    return np.argsort(mortonKeys(positions, bits), kind='stable')
+
+#   ParticleArrays
+#   Array-backed copy of a list of Particles or Gravitators.
+#   All particles share one stepno, and must all be Gravitators or all plain Particles.
+#   reorderEvery: how many timesteps between Morton reorderings. 0 turns reordering off.
+class ParticleArrays:
+    def __init__(self, particles, reorderEvery=0):
+        self.particles = list(particles)
+        count = len(self.particles)
+        self.reorderEvery = reorderEvery
+        self.stepno = 0
+        # ids[slot] is the stable ID of the particle stored at slot; slots[id] is where it is stored now.
+        self.ids = np.arange(count)
+        self.slots = np.arange(count)
+        self.position = np.array([p.position for p in self.particles], dtype=float).reshape(count, 3)
+        self.prevposition = np.array([p.prevposition for p in self.particles], dtype=float).reshape(count, 3)
+        self.initvelocity = np.array([p.initvelocity for p in self.particles], dtype=float).reshape(count, 3)
+        self.acceleration = np.zeros((count, 3))
+        self.mass = np.array([p.mass for p in self.particles], dtype=float)
+        self.forceConst = np.array([p.forceConst for p in self.particles], dtype=float)
+        self.charge = [p.charge for p in self.particles]
+        self._setCoefficientFactors()
+        # every pair's coefficient, built by allPairCoefficients the first time interact needs it
+        self._allPairs = None
+        self._coefficientKey = self._currentKey()
+        # positions by stable ID, one entry per recorded step
+        self.trajectory = []
+
+    # The pair coefficient (acceleration of i due to j at unit distance) factors as sign(i, j) * scale[i] * source[j].
+    # The cutoff path works from these per-particle factors, since an N x N matrix would not fit for big systems;
+    # the all-pairs path keeps the N x N matrix from allPairCoefficients instead.
+    def _setCoefficientFactors(self):
+        gravs = [charge == "grav" for charge in self.charge]
+        if all(gravs):
+            self.gravitating = True
+            self.scale = self.forceConst.copy()
+            self.source = self.mass.copy()
+        elif not any(gravs):
+            self.gravitating = False
+            self.scale = self.forceConst / self.mass
+            self.source = np.ones(len(self.mass))
+        else:
+            raise RuntimeError('Gravitational \"charges\" cannot be different. Charges are given as {0}.'.format(sorted(set(self.charge))))
+        self.chargeCode = np.unique(self.charge, return_inverse=True)[1].reshape(-1)
+
+    def _currentKey(self):
+        return (self.mass.tobytes(), self.forceConst.tobytes(), tuple(self.charge))
+
+    # Work the coefficients out again if a mass, charge or force constant has been changed since they were.
+    def _refreshCoefficients(self):
+        key = self._currentKey()
+        if key != self._coefficientKey:
+            self._setCoefficientFactors()
+            self._allPairs = None
+            self._coefficientKey = key
+
+    # The N x N matrix of pairCoefficients, with zeros on the diagonal. Kept until the masses or charges change.
+    def allPairCoefficients(self):
+        self._refreshCoefficients()
+        if self._allPairs is None:
+            everyone = np.arange(len(self.position))
+            self._allPairs = self.pairCoefficients(everyone[:, None], everyone[None, :])
+            np.fill_diagonal(self._allPairs, 0.)
+        return self._allPairs
+
+    # Coefficients for the pairs (first[k], second[k]); positive means attraction. Works on broadcast index arrays too.
+    def pairCoefficients(self, first, second):
+        coefficients = self.scale[first] * self.source[second]
+        if not self.gravitating:
+            # like charges repel
+            coefficients = np.where(self.chargeCode[first] == self.chargeCode[second], -coefficients, coefficients)
+        return coefficients
+
+    # Put the storage in Z-order. Every per-particle array is permuted together, and ids/slots are updated to match.
+    def reorder(self, bits=10):
+        # pick up any change to masses or charges first, or the stale coefficients would be permuted and kept as current
+        self._refreshCoefficients()
+        perm = mortonOrder(self.position, bits)
+        self.ids = self.ids[perm]
+        self.slots[self.ids] = np.arange(len(self.ids))
+        self.position = self.position[perm]
+        self.prevposition = self.prevposition[perm]
+        self.initvelocity = self.initvelocity[perm]
+        self.acceleration = self.acceleration[perm]
+        self.mass = self.mass[perm]
+        self.forceConst = self.forceConst[perm]
+        self.charge = [self.charge[i] for i in perm]
+        self.scale = self.scale[perm]
+        self.source = self.source[perm]
+        self.chargeCode = self.chargeCode[perm]
+        if self._allPairs is not None:
+            self._allPairs = self._allPairs[perm][:, perm]
+        self._coefficientKey = self._currentKey()
+        return perm
+
+    # Accelerations from every other particle. O(N^2) memory, fine for a few thousand particles.
+    # The N x N coefficient matrix stays in memory between calls, on top of the temporary arrays each call makes.
+    def interact(self):
+        distvec = self.position[None, :, :] - self.position[:, None, :]
+        sqrDist = (distvec**2).sum(axis=2)
+        np.fill_diagonal(sqrDist, 1.)
+        scale = self.allPairCoefficients() / (sqrDist * np.sqrt(sqrDist))
+        self.acceleration = np.einsum('ij,ijk->ik', scale, distvec)
+
+    # All pairs (i, j), i != j, closer than cutoff, found by binning particles into cells of side cutoff.
+    def neighbourPairs(self, cutoff):
+        cells = np.floor(self.position / cutoff).astype(np.int64)
+        cells -= cells.min(axis=0) - 1
+        dims = cells.max(axis=0) + 2
+        keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+        order = np.argsort(keys, kind='stable')
+        sortedKeys = keys[order]
+        firsts = []
+        seconds = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    neighbourKeys = keys + (dx * dims[1] + dy) * dims[2] + dz
+                    start = np.searchsorted(sortedKeys, neighbourKeys, side='left')
+                    stop = np.searchsorted(sortedKeys, neighbourKeys, side='right')
+                    counts = stop - start
+                    total = counts.sum()
+                    if total == 0:
+                        continue
+                    first = np.repeat(np.arange(len(keys)), counts)
+                    # position of each pair inside its particle's run of neighbours
+                    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                    firsts.append(first)
+                    seconds.append(order[np.repeat(start, counts) + offsets])
+        if not firsts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        first = np.concatenate(firsts)
+        second = np.concatenate(seconds)
+        distvec = self.position[second] - self.position[first]
+        close = (first != second) & ((distvec**2).sum(axis=1) < cutoff**2)
+        return first[close], second[close]
+
+    # Accelerations from particles closer than cutoff only.
+    def interactCutoff(self, cutoff):
+        self._refreshCoefficients()
+        first, second = self.neighbourPairs(cutoff)
+        distvec = self.position[second] - self.position[first]
+        sqrDist = (distvec**2).sum(axis=1)
+        scale = self.pairCoefficients(first, second) / (sqrDist * np.sqrt(sqrDist))
+        accel = np.zeros_like(self.position)
+        for i in range(0, 3):
+            accel[:, i] = np.bincount(first, weights=scale * distvec[:, i], minlength=len(self.position))
+        self.acceleration = accel
+
+    # Same integration as Particle.move, for every particle at once.
+    def move(self, timestep):
+        self.stepno += 1
+        if self.stepno == 1:
+            # No choice but to Taylor-expand this; Verlet integration requires an x(t - dt) position.
+            newposition = self.position + self.initvelocity*timestep + 0.5*self.acceleration*timestep**2
+        elif self.stepno > 1:
+            # Verlet Integration. x(t+dt) = 2x(t) - x(t-dt) + a(t)dt^2 + O(dt^4)
+            newposition = 2*self.position - self.prevposition + self.acceleration*timestep**2
+        else:
+            raise RuntimeError('At step {0}: this stepno is invalid.'.format(self.stepno))
+        self.prevposition = self.position
+        self.position = newposition
+
+    # One full timestep. With a cutoff, only nearby particles interact.
+    def step(self, timestep, cutoff=None):
+        if cutoff is None:
+            self.interact()
+        else:
+            self.interactCutoff(cutoff)
+        self.move(timestep)
+        if self.reorderEvery and self.stepno % self.reorderEvery == 0:
+            self.reorder()
+
+    # Position of the particle with the given stable ID.
+    def positionOf(self, partlId):
+        return self.position[self.slots[partlId]]
+
+    # Positions in stable-ID order, whatever the storage order is.
+    def positionsById(self):
+        return self.position[self.slots]
+
+    def record(self):
+        self.trajectory.append(self.positionsById())
+
+    # Copy the array state back onto the original Particle objects.
+    def updateParticles(self):
+        for partlId, partl in enumerate(self.particles):
+            slot = self.slots[partlId]
+            partl.position = list(self.position[slot])
+            partl.prevposition = list(self.prevposition[slot])
+            partl.acceleration = list(self.acceleration[slot])
+            partl.stepno = self.stepno
@@ -12,6 +12,11 @@ class Gravitator(Particle)
     Must be initialized with a mass. May also get a position as a second argument.
     Force constant is G = 6.674 * 10**(-11) m^3 / kg*s^2.
     Throws an error if two particles with different charges try to interact.
+
+class PairCoefficients
+    Works out every particle's acceleration in a system at once, using a table of per-pair coefficients
+    (G*m_j for Gravitators, +/- forceConst/m_i for Particles) that is built the first time it is needed and only rebuilt
+    when a mass, charge or force constant changes. Each pair then costs one sqrt instead of three.
     
     TODO: add particle radius and collisions.
 '''
@@ -40,6 +45,13 @@ class Particle:
         zComp = accel * distvec[2] / sqrt(sqrDist)
         return [xComp, yComp, zComp]
 
+    # acceleration towards otherPartl at unit distance; negative means repelled.
+    def pairCoefficient(self, otherPartl):
+        coefficient = self.forceConst / self.mass
+        if otherPartl.charge == self.charge:
+            return -coefficient
+        return coefficient
+
     def repelAccel(self, distvec):
         [negex, negy, negz] = self.attractAccel(distvec)
         return [-1*negex, -1*negy, -1*negz]
@@ -56,7 +68,7 @@ class Particle:
             else: 
                 toAdd = self.attractAccel(distancevec)
                 for i in range(0, 3):
-                accel[i] += toAdd[i]
+                    accel[i] += toAdd[i]
         self.acceleration = accel
 
     # gives the particle's new velocity and position, based on the acceleration. Uses Verlet integration.
@@ -102,6 +114,11 @@ class Gravitator(Particle):
         zComp = accel * distvec[2] / sqrt(sqrDist)
         return [xComp, yComp, zComp]
 
+    def pairCoefficient(self, otherPartl):
+        if otherPartl.charge != self.charge:
+            raise RuntimeError('Gravitational \"charges\" cannot be different. Charges are given as {0} and {1}.'.format(self.charge, otherPartl.charge))
+        return self.forceConst * otherPartl.mass
+
     def interact(self, listOtherPartls):
         accel = [0, 0, 0]
         for otherPartl in listOtherPartls:
@@ -113,3 +130,47 @@ class Gravitator(Particle):
             else: 
                 raise RuntimeError('Gravitational \"charges\" cannot be different. Charges are given as {0} and {1}.'.format(self.charge, otherPartl.charge))
         self.acceleration = accel
+
+#   PairCoefficients
+#   Cached pair coefficients for a list of particles that all interact with each other.
+#   interact() sets every particle's acceleration, the same as calling p.interact(all the others) for each p.
+#   The coefficients depend only on masses, charges and force constants, so they are kept until one of those changes.
+class PairCoefficients:
+    def __init__(self, particles):
+        self.particles = list(particles)
+        self.builds = 0 # how many times the coefficients have been worked out
+        self._key = None
+        self._coefficients = None
+
+    def _currentKey(self):
+        return tuple((partl.mass, partl.charge, partl.forceConst) for partl in self.particles)
+
+    # coefficients[i][j]: acceleration of particle i towards particle j at unit distance. The diagonal is unused.
+    def coefficients(self):
+        key = self._currentKey()
+        if key != self._key:
+            self._coefficients = [[0. if otherPartl is partl else partl.pairCoefficient(otherPartl) for otherPartl in self.particles] for partl in self.particles]
+            self._key = key
+            self.builds += 1
+        return self._coefficients
+
+    def interact(self):
+        coefficients = self.coefficients()
+        positions = [partl.position for partl in self.particles]
+        for i, partl in enumerate(self.particles):
+            (x, y, z) = positions[i]
+            row = coefficients[i]
+            accel = [0, 0, 0]
+            for j, otherPos in enumerate(positions):
+                if j == i:
+                    continue
+                dx = otherPos[0] - x
+                dy = otherPos[1] - y
+                dz = otherPos[2] - z
+                sqrDist = dx*dx + dy*dy + dz*dz
+                # coefficient / r^3, times the distance vector, is the inverse-square acceleration
+                scale = row[j] / (sqrDist * sqrt(sqrDist))
+                accel[0] += scale * dx
+                accel[1] += scale * dy
+                accel[2] += scale * dz
+            partl.acceleration = accel
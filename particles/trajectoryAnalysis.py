@@ -0,0 +1,172 @@
+import numpy as np
+
+'''
+trajectoryAnalysis.py
+@author: RedSunAtNight
+Questions to ask of a finished run, done as array operations instead of loops over the position lists.
+
+A trajectory is laid out the same way as elecpos and pospos in the simulation scripts: [[x0, x1, ...], [y0, ...], [z0, ...]],
+i.e. anything that numpy sees as a (3, T) array. That includes a .npy file opened with loadTrajectory, which is memory-mapped,
+so trajectories too big for memory are read one chunk of timesteps at a time. Pass chunkSize to any query to make it work that way;
+by default the whole trajectory is used at once.
+
+All answers are in timesteps. Multiply by dTime (or look the step up in timeaxis) to get a time.
+
+functions:
+    closestApproach(trajA, trajB) - step and distance of the minimum separation
+    escapeTime(trajA, trajB, radius) - first step after which the separation stays above radius
+    boundingBox(traj) - smallest and largest x, y, z reached
+    apsides(trajA, trajB) - steps where the separation has a local minimum (periapsis)
+    periodFromApsides(trajA, trajB) - orbital period from the spacing of the periapses
+    periodFromAutocorrelation(series) - period of any 1-D series, e.g. separation(trajA, trajB)
+'''
+
+def saveTrajectory(filename, traj):
+    np.save(filename, np.asarray(traj, dtype=float))
+
+# Memory-mapped, so nothing is read until a chunk of it is used.
+def loadTrajectory(filename):
+    return np.load(filename, mmap_mode='r')
+
+# Pull one particle's trajectory out of ParticleArrays.trajectory (a list of (N, 3) arrays in stable-ID order).
+def fromRecord(record, partlId):
+    return np.array([positions[partlId] for positions in record]).T
+
+def _asTrajectory(traj):
+    if isinstance(traj, np.ndarray):
+        arr = traj
+    else:
+        arr = np.asarray(traj, dtype=float)
+    if arr.ndim != 2 or arr.shape[0] != 3:
+        raise ValueError('A trajectory must have shape (3, steps), not {0}.'.format(arr.shape))
+    return arr
+
+# Yields (first step, block of shape (3, n)) for consecutive blocks of timesteps.
+def chunks(traj, chunkSize=None):
+    arr = _asTrajectory(traj)
+    steps = arr.shape[1]
+    if chunkSize is None:
+        chunkSize = max(steps, 1)
+    for start in range(0, steps, chunkSize):
+        yield start, np.asarray(arr[:, start:start + chunkSize], dtype=float)
+
+def _separationChunks(trajA, trajB, chunkSize):
+    arrA = _asTrajectory(trajA)
+    arrB = _asTrajectory(trajB)
+    if arrA.shape != arrB.shape:
+        raise ValueError('Trajectories have different lengths: {0} and {1}.'.format(arrA.shape[1], arrB.shape[1]))
+    for (start, blockA), (_, blockB) in zip(chunks(arrA, chunkSize), chunks(arrB, chunkSize)):
+        yield start, np.sqrt(((blockA - blockB)**2).sum(axis=0))
+
+# Distance between the two particles at every step.
+def separation(trajA, trajB, chunkSize=None):
+    return np.concatenate([sep for start, sep in _separationChunks(trajA, trajB, chunkSize)])
+
+# Returns (step, distance) of the closest approach.
+def closestApproach(trajA, trajB, chunkSize=None):
+    bestStep = None
+    bestDist = np.inf
+    for start, sep in _separationChunks(trajA, trajB, chunkSize):
+        i = np.argmin(sep)
+        if sep[i] < bestDist:
+            bestStep = start + int(i)
+            bestDist = float(sep[i])
+    return bestStep, bestDist
+
+# The step from which the particles are farther apart than radius until the end of the record.
+# 0 if they never came within radius; None if they are still within radius at the end.
+def escapeTime(trajA, trajB, radius, chunkSize=None):
+    lastInside = -1
+    steps = 0
+    for start, sep in _separationChunks(trajA, trajB, chunkSize):
+        inside = np.nonzero(sep <= radius)[0]
+        if len(inside):
+            lastInside = start + int(inside[-1])
+        steps = start + len(sep)
+    if lastInside == steps - 1:
+        return None
+    return lastInside + 1
+
+# Returns (mins, maxs), each [x, y, z].
+def boundingBox(traj, chunkSize=None):
+    mins = np.full(3, np.inf)
+    maxs = np.full(3, -np.inf)
+    for start, block in chunks(traj, chunkSize):
+        if block.shape[1]:
+            mins = np.minimum(mins, block.min(axis=1))
+            maxs = np.maximum(maxs, block.max(axis=1))
+    return [float(v) for v in mins], [float(v) for v in maxs]
+
+# Steps where the separation is a local minimum. A flat bottom counts once, at its first step.
+def apsides(trajA, trajB, chunkSize=None):
+    found = []
+    # the last two runs of the previous chunk (value and first step), so minima on chunk boundaries are not missed
+    carry = np.zeros(0)
+    carrySteps = np.zeros(0, dtype=np.int64)
+    for start, sep in _separationChunks(trajA, trajB, chunkSize):
+        joined = np.concatenate((carry, sep))
+        steps = np.concatenate((carrySteps, start + np.arange(len(sep))))
+        # collapse runs of equal separations to their first step, so a plateau is judged by the values either side of it
+        first = np.concatenate(([True], joined[1:] != joined[:-1]))
+        joined = joined[first]
+        steps = steps[first]
+        # the carried runs were only ever judged as neighbours, so nothing is reported twice
+        inner = np.nonzero((joined[1:-1] < joined[:-2]) & (joined[1:-1] < joined[2:]))[0] + 1
+        found.append(steps[inner])
+        carry = joined[-2:]
+        carrySteps = steps[-2:]
+    if not found:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate(found)
+
+# Mean number of steps between periapses, or None if there are fewer than two.
+def periodFromApsides(trajA, trajB, chunkSize=None):
+    steps = apsides(trajA, trajB, chunkSize)
+    if len(steps) < 2:
+        return None
+    return float(steps[-1] - steps[0]) / (len(steps) - 1)
+
+# Lag (in steps) of the first autocorrelation peak after the first zero crossing that is within tolerance of the highest
+# one, or None if the series never repeats. Every multiple of the period peaks at about the same height, so the highest
+# peak on its own could be any of them.
+# Needs the 1-D series in memory, which is a third the size of one trajectory.
+def periodFromAutocorrelation(series, tolerance=0.1):
+    series = np.asarray(series, dtype=float)
+    series = series - series.mean()
+    count = len(series)
+    if count < 3 or not series.any():
+        return None
+    size = 1 << int(2 * count - 1).bit_length()
+    spectrum = np.fft.rfft(series, size)
+    autocorr = np.fft.irfft(spectrum * np.conj(spectrum), size)[:count]
+    # each lag has fewer overlapping samples; normalise so long lags are not penalised
+    autocorr /= autocorr[0] * (count - np.arange(count)) / count
+    negative = np.nonzero(autocorr < 0)[0]
+    if not len(negative):
+        return None
+    # only lags with at least half the series overlapping are trustworthy
+    search = autocorr[negative[0]:count // 2 + 1]
+    peaks = np.nonzero((search[1:-1] > search[:-2]) & (search[1:-1] >= search[2:]))[0] + 1
+    if not len(peaks):
+        return None
+    heights = search[peaks]
+    tall = peaks[heights >= heights.max() - tolerance * autocorr[0]]
+    return int(negative[0] + tall[0])
+
+if __name__ == '__main__':
+    # Check the period finders against a series whose period is known.
+    steps = np.arange(0, 5000)
+    for period in (137, 48.5):
+        angle = 2 * np.pi * steps / period
+        # an eccentric orbit, with a little noise on the separation
+        sep = 1. / (1. + 0.6 * np.cos(angle)) + np.random.default_rng(3).normal(0, 0.01, len(steps))
+        for length in (1000, 2000, 5000):
+            found = periodFromAutocorrelation(sep[:length])
+            if abs(found - period) > 1:
+                raise RuntimeError('Autocorrelation found period {0} for a {1}-step orbit over {2} steps.'.format(found, period, length))
+    trajA = np.zeros((3, 5))
+    trajB = np.array([[3., 1., 1., 0., 2.], [0.] * 5, [0.] * 5])
+    for chunkSize in (None, 1, 2, 3):
+        if list(apsides(trajA, trajB, chunkSize)) != [3]:
+            raise RuntimeError('apsides found {0} for separations 3, 1, 1, 0, 2.'.format(list(apsides(trajA, trajB, chunkSize))))
+    print('ok')